@@ -20,9 +20,9 @@ func generate_avatar(image_path: String):
 func _generate_avatar_thread(image_path: String):
 	# Define paths
 	var python_script_path = "res://scripts/python/generate_avatar.py"
-	# Create a unique filename for the output gltf
+	# Create a unique filename for the output glb
 	var timestamp = Time.get_unix_time_from_system()
-	var output_gltf_path = "res://assets/avatars/avatar_" + str(timestamp) + ".gltf"
+	var output_gltf_path = "res://assets/avatars/avatar_" + str(timestamp) + ".glb"
 
 	# Prepare arguments for the script
 	var args = [
@@ -4,6 +4,24 @@ var udp = PacketPeerUDP.new()
 var pose_landmarks = []
 var python_pid = -1
 
+# Filtered IK target offsets published by the tracker after T-pose calibration.
+const IK_MESSAGE_MAGIC = "AIK1"
+# Sequenced landmark message: magic (4), camera frame sequence (u32), then 33 landmarks.
+const POSE_MESSAGE_MAGIC = "APS1"
+# Sequence of the camera frame behind pose_landmarks; echoed back in virtual camera frames.
+var pose_frame_seq := 0
+const IK_TARGET_LANDMARKS = {"left_arm": 15, "right_arm": 16, "left_leg": 27, "right_leg": 28}
+const CALIBRATE_URL = "http://127.0.0.1:40094/calibrate"
+var ik_offsets = {}
+var calibration_request: HTTPRequest
+
+# Keepalive for the tracker's subscriber registry (expires after 5 s of silence).
+const SUBSCRIBE_PORT = 5007
+const KEEPALIVE_INTERVAL = 1.0
+var time_since_keepalive := KEEPALIVE_INTERVAL
+
+signal calibration_finished(success)
+
 func _ready():
 	# The port should match the one in the Python script
 	var port = 5005
@@ -13,8 +31,12 @@ func _ready():
 
 	print("Listening on port: ", port)
 
+	calibration_request = HTTPRequest.new()
+	add_child(calibration_request)
+	calibration_request.request_completed.connect(_on_calibration_request_completed)
+
 	var python_script_path = ProjectSettings.globalize_path("res://scripts/python/holistic_tracker.py")
-	var args = ["-u", python_script_path]
+	var args = ["-u", python_script_path, "--transport", "udp", "--listen-http"]
 
 	# For Windows, it's often 'python.exe', but 'python' should work if it's in PATH.
 	# For macOS and Linux, it could be 'python' or 'python3'.
@@ -37,24 +59,31 @@ func _ready():
 			print("Python script started with PID: ", python_pid)
 
 
-func _process(_delta):
+func _process(delta):
+	time_since_keepalive += delta
+	if time_since_keepalive >= KEEPALIVE_INTERVAL:
+		time_since_keepalive = 0.0
+		send_keepalive()
+
 	while udp.get_available_packet_count() > 0:
 		var packet = udp.get_packet()
+		var magic = packet.slice(0, 4).get_string_from_ascii() if packet.size() >= 8 else ""
+		if magic == IK_MESSAGE_MAGIC:
+			_parse_ik_message(packet)
+			continue
+		if magic == POSE_MESSAGE_MAGIC and (packet.size() - 8) % 16 == 0:
+			var spb = StreamPeerBuffer.new()
+			spb.data_array = packet
+			spb.seek(4)
+			pose_frame_seq = spb.get_u32()
+			_parse_landmarks(spb, (packet.size() - 8) / 16)
+			continue
 		# Expecting binary data: 33 landmarks * 4 floats * 4 bytes/float = 528 bytes
 		# Format: x, y, z, visibility (all float32)
 		if packet.size() % 16 == 0:
-			var count = packet.size() / 16
-			pose_landmarks = []
 			var spb = StreamPeerBuffer.new()
 			spb.data_array = packet
-
-			for i in range(count):
-				var lm = {}
-				lm['x'] = spb.get_float()
-				lm['y'] = spb.get_float()
-				lm['z'] = spb.get_float()
-				lm['visibility'] = spb.get_float()
-				pose_landmarks.append(lm)
+			_parse_landmarks(spb, packet.size() / 16)
 		else:
 			# Fallback to JSON for compatibility or logging
 			var data_string = packet.get_string_from_utf8()
@@ -67,9 +96,60 @@ func _process(_delta):
 			else:
 				print("Packet Error: Invalid binary size and JSON parse failed.")
 
+func _parse_landmarks(spb, count):
+	pose_landmarks = []
+	for i in range(count):
+		var lm = {}
+		lm['x'] = spb.get_float()
+		lm['y'] = spb.get_float()
+		lm['z'] = spb.get_float()
+		lm['visibility'] = spb.get_float()
+		pose_landmarks.append(lm)
+
+func _parse_ik_message(packet):
+	# Header: magic (4), joint count (u16), reserved (u16), then count x (x, y, z) float32.
+	var spb = StreamPeerBuffer.new()
+	spb.data_array = packet
+	spb.seek(4)
+	var count = spb.get_u16()
+	spb.get_u16()
+	if packet.size() != 8 + count * 12:
+		return
+
+	var offsets = []
+	for i in range(count):
+		offsets.append(Vector3(spb.get_float(), spb.get_float(), spb.get_float()))
+
+	var target_names = IK_TARGET_LANDMARKS.keys()
+	for i in range(target_names.size()):
+		var target_name = target_names[i]
+		# Either just the IK targets in order, or all 33 joints in landmark order.
+		var index = i if count == target_names.size() else IK_TARGET_LANDMARKS[target_name]
+		if index < count:
+			ik_offsets[target_name] = offsets[index]
+
+func send_keepalive():
+	# Datagrams leave from the listening port, so the tracker replies to this instance.
+	udp.set_dest_address("127.0.0.1", SUBSCRIBE_PORT)
+	udp.put_packet("HELLO pose".to_ascii_buffer())
+	udp.put_packet("HELLO ik".to_ascii_buffer())
+
 func get_pose_landmarks():
 	return pose_landmarks
 
+func get_ik_offsets():
+	return ik_offsets
+
+func request_calibration():
+	ik_offsets = {}
+	var err = calibration_request.request(CALIBRATE_URL, ["Content-Type: application/json"], HTTPClient.METHOD_POST, "{}")
+	if err != OK:
+		print("Calibration request failed to start: ", err)
+		calibration_finished.emit(false)
+
+func _on_calibration_request_completed(_result, response_code, _headers, _body):
+	calibration_finished.emit(response_code == 200)
+
 func _notification(what):
 	if what == MainLoop.NOTIFICATION_WM_CLOSE_REQUEST:
 		if python_pid > 0 and OS.is_process_running(python_pid):
@@ -11,6 +11,12 @@ var connected := false
 var target_width := 640
 var target_height := 360
 
+# Versioned frame header understood by holistic_tracker.py's virtual_camera_loop.
+const FRAME_MAGIC := "AVCF"
+const FRAME_VERSION := 3
+const PIXEL_FORMAT_RGB := 0
+const PIXEL_FORMAT_RGBA := 1
+
 func _ready():
     # Only enable on desktop platforms
     if not (OS.get_name() in ["Windows", "macOS", "Linux", "FreeBSD", "NetBSD", "OpenBSD", "BSD"]):
@@ -62,15 +68,24 @@ func send_frame():
     # Resize to something reasonable for streaming
     image.resize(target_width, target_height)
 
-    # Convert to RGB8 if needed (pyvirtualcam expects RGB)
-    if image.get_format() != Image.FORMAT_RGB8:
-        image.convert(Image.FORMAT_RGB8)
+    # Send RGB8 or RGBA8 as-is so we skip a per-frame conversion; the tracker drops alpha.
+    var pixel_format := PIXEL_FORMAT_RGBA
+    if image.get_format() == Image.FORMAT_RGB8:
+        pixel_format = PIXEL_FORMAT_RGB
+    elif image.get_format() != Image.FORMAT_RGBA8:
+        image.convert(Image.FORMAT_RGBA8)
 
     # Get raw data (much faster than JPG encoding)
     var buffer = image.get_data()
 
     if buffer.size() > 0:
-        # Send width (4 bytes), height (4 bytes), then data
+        # Header: magic (4), version (2), pixel format (2), width (4), height (4),
+        # pose frame sequence (4), then data. The sequence lets the tracker measure
+        # camera-to-virtual-camera latency.
+        tcp_client.put_data(FRAME_MAGIC.to_ascii_buffer())
+        tcp_client.put_16(FRAME_VERSION)
+        tcp_client.put_16(pixel_format)
         tcp_client.put_32(target_width)
         tcp_client.put_32(target_height)
+        tcp_client.put_u32(MediaPipeBridge.pose_frame_seq)
         tcp_client.put_data(buffer)
@@ -2,73 +2,235 @@ import sys
 import time
 import json
 import os
+import struct
+import numpy as np
 
-def create_dummy_gltf(output_path):
-    # A minimal GLTF file for a single-triangle mesh.
-    # This is simple enough to create without a full library.
-    # In a real scenario, a library like pygltflib would be used.
+GLB_MAGIC = 0x46546C67  # "glTF"
+GLB_VERSION = 2
+GLB_CHUNK_JSON = 0x4E4F534A  # "JSON"
+GLB_CHUNK_BIN = 0x004E4942  # "BIN\0"
+
+COMPONENT_UNSIGNED_SHORT = 5123
+COMPONENT_UNSIGNED_INT = 5125
+COMPONENT_FLOAT = 5126
+TARGET_ARRAY_BUFFER = 34962
+TARGET_ELEMENT_ARRAY_BUFFER = 34963
+
+# Fraction of the base mesh resolution kept by each LOD level (LOD0 is the full mesh).
+DEFAULT_LOD_RATIOS = (1.0, 0.5, 0.25)
+
+
+def _align4(length):
+    return (length + 3) & ~3
+
+
+def create_placeholder_mesh(rings=48, segments=96):
+    # A UV sphere stands in for the generated body mesh until the real pipeline
+    # (TripoSR + SMPL-X) is wired up. It is large enough to make LODs meaningful.
+    # Each pole is a single vertex closed with a triangle fan, so no face is degenerate.
+    theta = np.linspace(0.0, np.pi, rings + 1, dtype=np.float32)[1:-1]
+    phi = np.linspace(0.0, 2.0 * np.pi, segments, endpoint=False, dtype=np.float32)
+    t, p = np.meshgrid(theta, phi, indexing="ij")
+    ring_positions = np.stack(
+        [np.sin(t) * np.cos(p), np.cos(t), np.sin(t) * np.sin(p)], axis=-1
+    ).reshape(-1, 3)
+    positions = np.concatenate(
+        [[[0.0, 1.0, 0.0]], ring_positions, [[0.0, -1.0, 0.0]]]
+    ).astype(np.float32)
+    top, bottom = 0, len(positions) - 1
+
+    s = np.arange(segments, dtype=np.int64)
+    first_ring = 1 + s
+    last_ring = 1 + (rings - 2) * segments + s
+    top_fan = np.stack([np.full_like(s, top), first_ring, 1 + (s + 1) % segments], axis=-1)
+    bottom_fan = np.stack(
+        [last_ring, np.full_like(s, bottom), last_ring - s + (s + 1) % segments], axis=-1
+    )
+
+    r = np.arange(rings - 2, dtype=np.int64)[:, None]
+    a = 1 + r * segments + s[None, :]
+    b = 1 + r * segments + (s[None, :] + 1) % segments
+    c = a + segments
+    d = b + segments
+    bands = np.concatenate(
+        [np.stack([a, c, b], axis=-1), np.stack([b, c, d], axis=-1)], axis=-1
+    ).reshape(-1, 3)
+    # Counter-clockwise seen from outside, as glTF expects for front faces.
+    return positions, np.concatenate([top_fan, bands, bottom_fan])[:, [0, 2, 1]]
+
+
+def _drop_degenerate(triangles):
+    keep = (
+        (triangles[:, 0] != triangles[:, 1])
+        & (triangles[:, 1] != triangles[:, 2])
+        & (triangles[:, 0] != triangles[:, 2])
+    )
+    return triangles[keep]
+
+
+def decimate_mesh(positions, triangles, ratio):
+    """Vertex-clustering decimation on a uniform grid.
+
+    The grid cell size is chosen from the surface area so roughly `ratio` of
+    the vertices survive. Clustered vertices are averaged, triangles collapsed
+    to a line or point are dropped and duplicate triangles are removed.
+    """
+    if ratio >= 1.0:
+        return positions, triangles
+
+    # The mesh is a surface, so the number of occupied cells is roughly its area
+    # divided by the cell face area.
+    corners = positions[triangles]
+    area = 0.5 * np.linalg.norm(
+        np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1
+    ).sum()
+    target_vertices = max(4, int(len(positions) * ratio))
+    cell_size = max(float(np.sqrt(area / target_vertices)), 1e-6)
+
+    bb_min = positions.min(axis=0)
+    cells = np.floor((positions - bb_min) / cell_size).astype(np.int64)
+    _, cluster, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    cluster = cluster.reshape(-1)
+
+    merged = np.zeros((len(counts), 3), dtype=np.float64)
+    np.add.at(merged, cluster, positions)
+    merged = (merged / counts[:, None]).astype(np.float32)
+
+    remapped = _drop_degenerate(cluster[triangles])
+    _, first = np.unique(np.sort(remapped, axis=1), axis=0, return_index=True)
+    remapped = remapped[np.sort(first)]
+
+    # Compact away clusters no longer referenced by any triangle.
+    used, compact = np.unique(remapped, return_inverse=True)
+    return merged[used], compact.reshape(-1, 3)
+
+
+def build_lods(positions, triangles, ratios=DEFAULT_LOD_RATIOS):
+    return [decimate_mesh(positions, triangles, ratio) for ratio in ratios]
+
+
+def write_glb(output_path, lods, ratios=DEFAULT_LOD_RATIOS):
+    """Write each LOD as its own mesh/node in a single binary glTF.
+
+    Only LOD0 is part of the scene. It lists the lower levels through the
+    MSFT_lod extension, so loaders without LOD support (Godot included) draw
+    the full mesh once instead of every level on top of each other.
+
+    Buffer views are 4-byte aligned and the BIN chunk is streamed to disk view
+    by view instead of being assembled in memory first.
+    """
     gltf = {
+        "asset": {"version": "2.0", "generator": "AvatarStream generate_avatar.py"},
         "scene": 0,
         "scenes": [{"nodes": [0]}],
-        "nodes": [{"mesh": 0}],
-        "meshes": [{
-            "primitives": [{
-                "attributes": {
-                    "POSITION": 1
-                },
-                "indices": 0
-            }]
-        }],
-        "buffers": [{
-            "uri": "data:application/octet-stream;base64,AAABAAIAAAAAAAAAAAAAAAAAAAAAAIA/AAAAAAAAAAAAAIA/AIA/AAAAAAAAAAAAAIA/AAAAAAAAAAAAAAAAAAAAAIA/AAAAAAAAAAAAAIA/AIA/AAAAAAAAAAAAAIA/AAAAAAAAAA==",
-            "byteLength": 36
-        }],
-        "bufferViews": [{
+        "nodes": [],
+        "meshes": [],
+        "accessors": [],
+        "bufferViews": [],
+        "buffers": [],
+    }
+    blobs = []
+    offset = 0
+
+    def add_view(blob, target):
+        nonlocal offset
+        gltf["bufferViews"].append({
             "buffer": 0,
-            "byteOffset": 0,
-            "byteLength": 36,
-            "target": 34962
-        }],
-        "accessors": [{
-            "bufferView": 0,
-            "componentType": 5123,
-            "count": 3,
-            "type": "SCALAR"
-        }, {
-            "bufferView": 0,
-            "byteOffset": 12,
-            "componentType": 5126,
-            "count": 3,
+            "byteOffset": offset,
+            "byteLength": len(blob),
+            "target": target,
+        })
+        blobs.append(blob)
+        offset += _align4(len(blob))
+        return len(gltf["bufferViews"]) - 1
+
+    for level, (positions, triangles) in enumerate(lods):
+        positions = np.ascontiguousarray(positions, dtype="<f4")
+        if len(positions) <= 0xFFFF:
+            indices = np.ascontiguousarray(triangles.reshape(-1), dtype="<u2")
+            component_type = COMPONENT_UNSIGNED_SHORT
+        else:
+            indices = np.ascontiguousarray(triangles.reshape(-1), dtype="<u4")
+            component_type = COMPONENT_UNSIGNED_INT
+
+        index_view = add_view(memoryview(indices).cast("B"), TARGET_ELEMENT_ARRAY_BUFFER)
+        position_view = add_view(memoryview(positions).cast("B"), TARGET_ARRAY_BUFFER)
+
+        gltf["accessors"].append({
+            "bufferView": index_view,
+            "componentType": component_type,
+            "count": int(indices.size),
+            "type": "SCALAR",
+        })
+        gltf["accessors"].append({
+            "bufferView": position_view,
+            "componentType": COMPONENT_FLOAT,
+            "count": int(len(positions)),
             "type": "VEC3",
-            "max": [1.0, 1.0, 0.0],
-            "min": [0.0, 0.0, 0.0]
-        }],
-        "asset": {
-            "version": "2.0"
-        }
-    }
+            "min": [float(v) for v in positions.min(axis=0)],
+            "max": [float(v) for v in positions.max(axis=0)],
+        })
+        gltf["meshes"].append({
+            "name": f"avatar_lod{level}",
+            "primitives": [{
+                "attributes": {"POSITION": len(gltf["accessors"]) - 1},
+                "indices": len(gltf["accessors"]) - 2,
+            }],
+        })
+        gltf["nodes"].append({
+            "name": f"Avatar_LOD{level}",
+            "mesh": level,
+            "extras": {"lod_level": level, "lod_ratio": float(ratios[level])},
+        })
+
+    if len(lods) > 1:
+        gltf["extensionsUsed"] = ["MSFT_lod"]
+        gltf["nodes"][0]["extensions"] = {"MSFT_lod": {"ids": list(range(1, len(lods)))}}
+
+    gltf["buffers"].append({"byteLength": offset})
+
+    json_chunk = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    json_chunk += b" " * (_align4(len(json_chunk)) - len(json_chunk))
+    total_length = 12 + 8 + len(json_chunk) + 8 + offset
+
     # Ensure the directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, 'w') as f:
-        json.dump(gltf, f, indent=4)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(struct.pack("<III", GLB_MAGIC, GLB_VERSION, total_length))
+        f.write(struct.pack("<II", len(json_chunk), GLB_CHUNK_JSON))
+        f.write(json_chunk)
+        f.write(struct.pack("<II", offset, GLB_CHUNK_BIN))
+        for blob in blobs:
+            f.write(blob)
+            f.write(b"\x00" * (_align4(len(blob)) - len(blob)))
+
+
+def create_dummy_glb(output_path, ratios=DEFAULT_LOD_RATIOS):
+    positions, triangles = create_placeholder_mesh()
+    write_glb(output_path, build_lods(positions, triangles, ratios), ratios)
+
 
 def write_progress(percentage):
     print(f"PROGRESS: {percentage}", flush=True)
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
-        print("Usage: python generate_avatar.py <input_image> <output_gltf>")
+        print("Usage: python generate_avatar.py <input_image> <output_glb>")
         sys.exit(1)
 
     input_image_path = sys.argv[1]
-    output_gltf_path = sys.argv[2]
+    output_glb_path = sys.argv[2]
+    # Always emit binary glTF; callers read the final path back from the SUCCESS line.
+    root, ext = os.path.splitext(output_glb_path)
+    if ext.lower() != ".glb":
+        output_glb_path = root + ".glb"
 
     # Simulate a multi-step process
     steps = {
         "Preprocessing with OpenCV": 25,
         "Generating mesh with TripoSR": 75,
         "Rigging with SMPL-X": 95,
-        "Exporting GLTF": 100
+        "Exporting GLB": 100
     }
 
     write_progress(0)
@@ -80,6 +242,6 @@ if __name__ == "__main__":
         time.sleep(1) # Simulate work
         write_progress(progress)
 
-    create_dummy_gltf(output_gltf_path)
-    print(f"SUCCESS: {output_gltf_path}", flush=True)
+    create_dummy_glb(output_glb_path)
+    print(f"SUCCESS: {output_glb_path}", flush=True)
     sys.exit(0)
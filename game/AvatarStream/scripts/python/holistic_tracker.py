@@ -1,28 +1,51 @@
 import cv2
 import mediapipe as mp
 import socket
+import struct
 import json
 import time
 import threading
 import numpy as np
 import argparse
+import atexit
+import collections
+import contextlib
+import functools
+import ipaddress
 import platform
 import logging
+import logging.handlers
+import math
 import os
+import queue
 import urllib.parse
 import urllib.request
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pose_shm import PoseShmWriter
 
 # UDP settings
 UDP_IP = "127.0.0.1"
 UDP_PORT = 5005
 VIRTUAL_CAM_PORT = 5006
+SUBSCRIBE_PORT = 5007
+SUBSCRIBER_TTL_S = 5.0
+VCAM_RETRY_S = 2.0
+POSE_FORMATS = ("binary", "pose", "ik", "json")
 DEFAULT_LOG_FILE = os.path.join("logs", "holistic_tracker.log")
+DEFAULT_LOG_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_LOG_BACKUPS = 3
+LOG_QUEUE_SIZE = 10000
+DEFAULT_CAPTURE_CACHE_FILE = os.path.join("cache", "capture_modes.json")
 DEFAULT_HTTP_URL = "http://127.0.0.1:40094/pose"
 DEFAULT_VIEWER_FILE = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "web", "pose_viewer.html")
 )
 logger = logging.getLogger("holistic_tracker")
+# Categories that can fire per request or per frame get their own child logger so
+# they can be sampled and rate limited without touching lifecycle messages.
+access_logger = logger.getChild("http")
+debug_logger = logger.getChild("debug")
+frame_logger = logger.getChild("frame")
 
 POSE_LANDMARK_NAMES = [
     "nose",
@@ -76,40 +99,1123 @@ POSE_SEGMENTS = {
 }
 
 
+# Tracking runs on the unflipped camera image; landmarks are mirrored afterwards to
+# the selfie view, where MediaPipe's "left" is the camera image's "right".
+POSE_MIRROR_INDICES = np.array(
+    [
+        POSE_LANDMARK_NAMES.index(
+            "right_" + name[5:] if name.startswith("left_")
+            else "left_" + name[6:] if name.startswith("right_")
+            else name
+        )
+        for name in POSE_LANDMARK_NAMES
+    ],
+    dtype=np.intp,
+)
+
+SEGMENT_INDICES = np.array(
+    [[POSE_LANDMARK_NAMES.index(start), POSE_LANDMARK_NAMES.index(end)] for start, end in POSE_SEGMENTS.values()],
+    dtype=np.intp,
+)
+
+# Joint angles are measured between two segments that meet at the joint.
+JOINT_ANGLES = {
+    "left_shoulder": ("left_torso", "left_upper_arm"),
+    "right_shoulder": ("right_torso", "right_upper_arm"),
+    "left_elbow": ("left_upper_arm", "left_forearm"),
+    "right_elbow": ("right_upper_arm", "right_forearm"),
+    "left_hip": ("left_torso", "left_thigh"),
+    "right_hip": ("right_torso", "right_thigh"),
+    "left_knee": ("left_thigh", "left_calf"),
+    "right_knee": ("right_thigh", "right_calf"),
+}
+
+
+def _joint_angle_indices():
+    rows = []
+    for joint, (first, second) in JOINT_ANGLES.items():
+        a = [POSE_LANDMARK_NAMES.index(name) for name in POSE_SEGMENTS[first]]
+        b = [POSE_LANDMARK_NAMES.index(name) for name in POSE_SEGMENTS[second]]
+        center = POSE_LANDMARK_NAMES.index(joint)
+        rows.append([a[0] if a[1] == center else a[1], center, b[0] if b[1] == center else b[1]])
+    return np.array(rows, dtype=np.intp)
+
+
+JOINT_ANGLE_INDICES = _joint_angle_indices()
+_SHOULDERS = [POSE_LANDMARK_NAMES.index("left_shoulder"), POSE_LANDMARK_NAMES.index("right_shoulder")]
+_HIPS = [POSE_LANDMARK_NAMES.index("left_hip"), POSE_LANDMARK_NAMES.index("right_hip")]
+_TORSO_SEGMENTS = [list(POSE_SEGMENTS).index("left_torso"), list(POSE_SEGMENTS).index("right_torso")]
+FEATURE_MIN_VISIBILITY = 0.5
+
+
 class PoseState:
     def __init__(self):
         self._lock = threading.Lock()
         self._payload = None
+        self._features = None
         self._updated_ms = None
+        self._generation = 0
+        self._encoded = {}
 
-    def set_payload(self, payload):
+    def set_payload(self, payload, features=None):
         with self._lock:
             self._payload = payload
+            self._features = features
             self._updated_ms = int(time.time() * 1000)
+            self._generation += 1
+            self._encoded = {}
 
     def get_snapshot(self):
         with self._lock:
             return self._payload, self._updated_ms
 
+    def get_features(self):
+        with self._lock:
+            return self._features, self._updated_ms
+
+    def get_encoded(self, key, encode):
+        """Return `encode(payload, features, updated_ms)` serialized once per pose update.
+
+        Pollers hitting the same endpoint between frames share the cached bytes.
+        Encoding runs outside the lock so set_payload() never waits for it; the
+        result is only cached if no newer pose arrived meanwhile.
+        Returns None until the first pose has been set.
+        """
+        with self._lock:
+            if self._payload is None:
+                return None
+            blob = self._encoded.get(key)
+            if blob is not None:
+                return blob
+            payload, features, updated_ms, generation = (
+                self._payload, self._features, self._updated_ms, self._generation
+            )
+        blob = encode(payload, features, updated_ms)
+        with self._lock:
+            if self._generation == generation:
+                self._encoded.setdefault(key, blob)
+        return blob
+
+
+def compute_pose_features(landmarks):
+    """Derive skeleton features from (33, 4) landmarks in one vectorized pass.
+
+    Body scale is the mean shoulder-to-hip length. Normalized coordinates are
+    relative to the hip midpoint in image axes; torso coordinates are expressed
+    in a frame with x from right hip to left hip, y from hips to shoulders and
+    z = x cross y, both divided by the body scale.
+    """
+    points = landmarks[:, :3].astype(np.float32)
+    visible = landmarks[:, 3] >= FEATURE_MIN_VISIBILITY
+
+    bones = points[SEGMENT_INDICES[:, 1]] - points[SEGMENT_INDICES[:, 0]]
+    bone_lengths = np.linalg.norm(bones, axis=1)
+    bone_visible = visible[SEGMENT_INDICES].all(axis=1)
+
+    first = points[JOINT_ANGLE_INDICES[:, 0]] - points[JOINT_ANGLE_INDICES[:, 1]]
+    second = points[JOINT_ANGLE_INDICES[:, 2]] - points[JOINT_ANGLE_INDICES[:, 1]]
+    denom = np.linalg.norm(first, axis=1) * np.linalg.norm(second, axis=1)
+    cosine = np.einsum("ij,ij->i", first, second) / np.maximum(denom, 1e-9)
+    joint_angles = np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+    angle_visible = visible[JOINT_ANGLE_INDICES].all(axis=1) & (denom > 1e-9)
+    joint_angles[~angle_visible] = np.nan
+
+    hip_mid = points[_HIPS].mean(axis=0)
+    shoulder_mid = points[_SHOULDERS].mean(axis=0)
+    scale = float(max(bone_lengths[_TORSO_SEGMENTS].mean(), 1e-6))
+    centered = points - hip_mid
+
+    x_axis = points[_HIPS[0]] - points[_HIPS[1]]
+    x_axis /= max(np.linalg.norm(x_axis), 1e-9)
+    up = shoulder_mid - hip_mid
+    z_axis = np.cross(x_axis, up)
+    z_axis /= max(np.linalg.norm(z_axis), 1e-9)
+    y_axis = np.cross(z_axis, x_axis)
+    rotation = np.stack([x_axis, y_axis, z_axis])
+
+    return {
+        "scale": scale,
+        "origin": hip_mid,
+        "axes": rotation,
+        "visible": visible,
+        "normalized": centered / scale,
+        "torso": centered @ rotation.T / scale,
+        "bone_lengths": bone_lengths,
+        "bone_visible": bone_visible,
+        "joint_angles": joint_angles,
+    }
+
+
+def _rounded(array):
+    return np.round(array.astype(np.float64), 6).tolist()
+
+
+def build_features_payload(features, timestamp_ms):
+    if features is None:
+        return {"timestamp_ms": timestamp_ms, "has_pose": False}
+
+    def points_by_name(points):
+        return {name: dict(zip("xyz", point)) for name, point in zip(POSE_LANDMARK_NAMES, _rounded(points))}
+
+    angles = _rounded(features["joint_angles"])
+    return {
+        "timestamp_ms": timestamp_ms,
+        "has_pose": True,
+        "scale": _round6(features["scale"]),
+        "torso_frame": {
+            "origin": dict(zip("xyz", _rounded(features["origin"]))),
+            "x_axis": dict(zip("xyz", _rounded(features["axes"][0]))),
+            "y_axis": dict(zip("xyz", _rounded(features["axes"][1]))),
+            "z_axis": dict(zip("xyz", _rounded(features["axes"][2]))),
+        },
+        "visible": dict(zip(POSE_LANDMARK_NAMES, features["visible"].tolist())),
+        "normalized": points_by_name(features["normalized"]),
+        "torso": points_by_name(features["torso"]),
+        "bone_lengths": {
+            name: {"length": length, "visible": visible}
+            for name, length, visible in zip(POSE_SEGMENTS, _rounded(features["bone_lengths"]), features["bone_visible"].tolist())
+        },
+        # NaN (not visible) becomes null so the body stays valid JSON.
+        "joint_angles": {name: None if angle != angle else angle for name, angle in zip(JOINT_ANGLES, angles)},
+    }
+
+
+def encode_features_binary(features):
+    """Compact little-endian float32 layout, documented in POSE_API.md."""
+    if features is None:
+        return b""
+    return b"".join(
+        np.ascontiguousarray(part, dtype="<f4").tobytes()
+        for part in (
+            [features["scale"]],
+            features["origin"],
+            features["axes"],
+            features["normalized"],
+            features["torso"],
+            features["bone_lengths"],
+            features["joint_angles"],
+        )
+    )
+
+
+IK_TARGET_LANDMARKS = {
+    "left_arm": "left_wrist",
+    "right_arm": "right_wrist",
+    "left_leg": "left_ankle",
+    "right_leg": "right_ankle",
+}
+IK_TARGET_INDICES = [POSE_LANDMARK_NAMES.index(name) for name in IK_TARGET_LANDMARKS.values()]
+IK_MESSAGE_MAGIC = b"AIK1"
+POSE_MESSAGE_MAGIC = b"APS1"
+POSE_MESSAGE_HEADER = struct.Struct("<4sI")
+IK_MESSAGE_HEADER = struct.Struct("<4sHH")
+DEFAULT_POSE_SCALE = (2.0, 2.0, 1.0)
+# calibrate() only accepts a pose this recent; otherwise it waits for the next tracked frame.
+CALIBRATION_MAX_AGE_S = 0.1
+CALIBRATION_WAIT_S = 2.0
+
+
+class PoseCalibrator:
+    """T-pose calibration and Kalman-filtered IK target offsets.
+
+    Offsets are computed for every landmark at once as
+    (current - reference) * pose_scale with Y inverted to match Godot's
+    up axis, then smoothed by a per-component scalar Kalman filter.
+    """
+
+    def __init__(self, pose_scale=DEFAULT_POSE_SCALE, process_noise=0.01, measurement_noise=0.2):
+        self._lock = threading.Lock()
+        self._scale = np.array(pose_scale, dtype=np.float32) * np.array([1.0, -1.0, 1.0], dtype=np.float32)
+        self._q = process_noise
+        self._r = measurement_noise
+        self._tracked = threading.Condition(self._lock)
+        self._latest = None
+        self._latest_time = None
+        self._reference = None
+        self._calibrated_ms = None
+        self._x = None
+        self._p = 1.0
+        self._offsets = None
+
+    def calibrate(self, max_age_s=CALIBRATION_MAX_AGE_S, wait_s=CALIBRATION_WAIT_S):
+        """Use the current pose as the T-pose reference.
+
+        A pose older than `max_age_s` (tracking was lost) is never used; the
+        call waits up to `wait_s` for a new one and returns False if none comes.
+        """
+        deadline = time.monotonic() + wait_s
+        with self._tracked:
+            while self._latest is None or time.monotonic() - self._latest_time > max_age_s:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._tracked.wait(remaining)
+            self._reference = self._latest[:, :3].copy()
+            self._calibrated_ms = int(time.time() * 1000)
+            self._x = np.zeros_like(self._reference)
+            self._p = 1.0
+            self._offsets = None
+            return True
+
+    def set_smoothing(self, process_noise=None, measurement_noise=None):
+        with self._lock:
+            if process_noise is not None:
+                self._q = process_noise
+            if measurement_noise is not None:
+                self._r = measurement_noise
+
+    def get_smoothing(self):
+        with self._lock:
+            return self._q, self._r
+
+    def reset(self):
+        with self._lock:
+            self._reference = None
+            self._calibrated_ms = None
+            self._x = None
+            self._offsets = None
+
+    def update(self, landmarks):
+        """Record the latest (33, 4) landmarks and return filtered (33, 3) offsets, or None if uncalibrated."""
+        with self._lock:
+            self._latest = landmarks
+            self._latest_time = time.monotonic()
+            self._tracked.notify_all()
+            if self._reference is None:
+                return None
+
+            measurement = (landmarks[:, :3] - self._reference) * self._scale
+            # All components share q and r, so a single error covariance covers them.
+            self._p += self._q
+            k = self._p / (self._p + self._r)
+            self._x += k * (measurement - self._x)
+            self._p *= 1.0 - k
+            self._offsets = self._x.copy()
+            return self._offsets
+
+    def get_snapshot(self):
+        with self._lock:
+            return self._reference is not None, self._calibrated_ms, self._offsets
+
+
+def encode_ik_message(offsets, all_joints=False):
+    joints = offsets if all_joints else offsets[IK_TARGET_INDICES]
+    header = IK_MESSAGE_HEADER.pack(IK_MESSAGE_MAGIC, len(joints), 0)
+    return header + np.ascontiguousarray(joints, dtype="<f4").tobytes()
+
+
+def build_ik_targets_body(pose_calibrator):
+    calibrated, calibrated_ms, offsets = pose_calibrator.get_snapshot()
+    targets = {}
+    if offsets is not None:
+        for target_name, index in zip(IK_TARGET_LANDMARKS, IK_TARGET_INDICES):
+            x, y, z = offsets[index]
+            targets[target_name] = {"x": _round6(x), "y": _round6(y), "z": _round6(z)}
+    return {
+        "ok": True,
+        "calibrated": calibrated,
+        "calibrated_ms": calibrated_ms,
+        "ik_targets": targets,
+    }
+
+
+class SubscriberRegistry:
+    """UDP pose subscribers keyed by (address, format).
+
+    Subscribers refresh themselves with HELLO datagrams or repeated
+    POST /subscribe calls and are dropped after `ttl` seconds of silence.
+    Persistent subscribers (the --transport udp default target) never expire.
+    """
+
+    def __init__(self, ttl=SUBSCRIBER_TTL_S):
+        self._lock = threading.Lock()
+        self._ttl = ttl
+        self._subscribers = {}
+
+    def subscribe(self, addr, fmt="binary", max_rate=0.0, persistent=False):
+        if fmt not in POSE_FORMATS:
+            raise ValueError(f"Unknown pose format: {fmt}")
+        now = time.monotonic()
+        key = (addr, fmt)
+        with self._lock:
+            entry = self._subscribers.get(key)
+            if entry is None:
+                entry = {"last_sent": 0.0, "persistent": persistent}
+                self._subscribers[key] = entry
+                logger.info("Subscriber added: %s:%s format=%s max_rate=%s", addr[0], addr[1], fmt, max_rate)
+            entry["max_rate"] = max(0.0, float(max_rate))
+            entry["last_seen"] = now
+
+    def unsubscribe(self, addr, fmt=None):
+        with self._lock:
+            for key in [key for key in self._subscribers if key[0] == addr and fmt in (None, key[1])]:
+                del self._subscribers[key]
+                logger.info("Subscriber removed: %s:%s format=%s", addr[0], addr[1], key[1])
+
+    def collect_due(self, now=None):
+        """Expire stale subscribers and return {format: [addr, ...]} for those due a message."""
+        now = time.monotonic() if now is None else now
+        due = {}
+        with self._lock:
+            for key, entry in list(self._subscribers.items()):
+                addr, fmt = key
+                if not entry["persistent"] and now - entry["last_seen"] > self._ttl:
+                    del self._subscribers[key]
+                    logger.info("Subscriber expired: %s:%s format=%s", addr[0], addr[1], fmt)
+                    continue
+                if entry["max_rate"] > 0 and now - entry["last_sent"] < 1.0 / entry["max_rate"]:
+                    continue
+                entry["last_sent"] = now
+                due.setdefault(fmt, []).append(addr)
+        return due
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {
+                    "host": addr[0],
+                    "port": addr[1],
+                    "format": fmt,
+                    "max_rate": entry["max_rate"],
+                    "persistent": entry["persistent"],
+                }
+                for (addr, fmt), entry in self._subscribers.items()
+            ]
+
+
+class LatencyTracker:
+    """Per-frame latency distributions keyed by camera frame sequence.
+
+    record_capture() notes when cap.read() returned a frame. record_output()
+    is called when a rendered frame carrying that sequence reaches
+    pyvirtualcam; only the first output per sequence counts, so repeated
+    frames at the virtual camera rate do not skew the glass-to-glass numbers.
+    """
+
+    HISTOGRAM_BIN_MS = 10
+    HISTOGRAM_BINS = 50
+
+    def __init__(self, window=1024, pending=256):
+        self._lock = threading.Lock()
+        self._pending = pending
+        self._captures = collections.OrderedDict()
+        self._window = window
+        self._samples = {}
+
+    def record_capture(self, frame_seq, t=None):
+        t = time.perf_counter() if t is None else t
+        with self._lock:
+            self._captures[frame_seq] = t
+            while len(self._captures) > self._pending:
+                self._captures.popitem(last=False)
+
+    def record_output(self, frame_seq, t=None):
+        if not frame_seq:
+            return None
+        t = time.perf_counter() if t is None else t
+        with self._lock:
+            captured = self._captures.pop(frame_seq, None)
+            if captured is None:
+                return None
+            # Older frames can no longer be shown once a newer one has been.
+            while self._captures and next(iter(self._captures)) < frame_seq:
+                self._captures.popitem(last=False)
+        latency_ms = (t - captured) * 1000.0
+        self.record_sample("glass_to_glass", latency_ms)
+        return latency_ms
+
+    def record_sample(self, name, value_ms):
+        with self._lock:
+            ring = self._samples.get(name)
+            if ring is None:
+                ring = {"values": np.full(self._window, np.nan), "index": 0}
+                self._samples[name] = ring
+            ring["values"][ring["index"] % self._window] = value_ms
+            ring["index"] += 1
+
+    def stats(self):
+        with self._lock:
+            rings = {name: (ring["values"].copy(), ring["index"]) for name, ring in self._samples.items()}
+
+        result = {}
+        for name, (ring, index) in rings.items():
+            values = ring[~np.isnan(ring)]
+            last = ring[(index - 1) % self._window]
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            counts, _ = np.histogram(
+                np.minimum(values, self.HISTOGRAM_BIN_MS * self.HISTOGRAM_BINS - 1e-6),
+                bins=self.HISTOGRAM_BINS,
+                range=(0, self.HISTOGRAM_BIN_MS * self.HISTOGRAM_BINS),
+            )
+            result[name] = {
+                "samples": int(values.size),
+                "last_ms": round(float(last), 3),
+                "mean_ms": round(float(values.mean()), 3),
+                "p50_ms": round(float(p50), 3),
+                "p90_ms": round(float(p90), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(values.max()), 3),
+                "histogram": {"bin_ms": self.HISTOGRAM_BIN_MS, "counts": counts.tolist()},
+            }
+        return result
+
+
+CONTROL_APPLY_TIMEOUT_S = 5.0
+TRANSPORTS = ("http", "udp", "none")
+# Below this the tracking loop would wait so long between frames that it looks hung.
+MIN_INFERENCE_FPS = 1.0
+
+
+def _finite_float(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError("must be a finite number")
+    return float(value)
+
+
+def _positive_float(value):
+    value = _finite_float(value)
+    if value <= 0:
+        raise ValueError("must be > 0")
+    return value
+
+
+def _inference_fps(value):
+    value = _finite_float(value)
+    if value != 0 and value < MIN_INFERENCE_FPS:
+        raise ValueError(f"must be 0 (unlimited) or >= {MIN_INFERENCE_FPS:g}")
+    return value
+
+
+def _choice(*choices):
+    def parse(value):
+        value = str(value).lower()
+        if value not in choices:
+            raise ValueError(f"must be one of {', '.join(choices)}")
+        return value
+    return parse
+
+
+def _integer(value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError("must be an integer")
+    return value
+
+
+def _port(value):
+    value = _integer(value)
+    if not 0 < value < 65536:
+        raise ValueError("must be in 1-65535")
+    return value
+
+
+def _http_url(value):
+    value = str(value)
+    if urllib.parse.urlsplit(value).scheme not in ("http", "https"):
+        raise ValueError("must be an http(s) URL")
+    return value
+
+
+def _udp_host(value):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("must be a non-empty host name")
+    value = value.strip()
+    # Pose datagrams go out on an IPv4 socket, so the host must resolve to IPv4.
+    try:
+        socket.getaddrinfo(value, None, socket.AF_INET, socket.SOCK_DGRAM)
+    except socket.gaierror:
+        raise ValueError(f"cannot resolve {value}")
+    return value
+
+
+def _camera_index(value):
+    value = _integer(value)
+    if value < 0:
+        raise ValueError("must be >= 0")
+    return value
+
+
+def _flag(value):
+    if not isinstance(value, bool):
+        raise ValueError("must be true or false")
+    return value
+
+
+CONTROL_FIELDS = {
+    "camera_index": _camera_index,
+    "transport": _choice(*TRANSPORTS),
+    "http_url": _http_url,
+    "http_method": _choice("get", "post"),
+    "udp_host": _udp_host,
+    "udp_port": _port,
+    "inference_fps": _inference_fps,
+    "ik_process_noise": _positive_float,
+    "ik_measurement_noise": _positive_float,
+    "debug": _flag,
+    "debug_interval": _positive_float,
+}
+
+
+def is_loopback_host(host):
+    """True if every address `host` resolves to is on this machine."""
+    try:
+        infos = socket.getaddrinfo(host, None)
+    except (socket.gaierror, UnicodeError):
+        return False
+    return bool(infos) and all(ipaddress.ip_address(info[4][0].split("%")[0]).is_loopback for info in infos)
+
+
+def validate_control_changes(body, allow_remote=False):
+    """Normalize a POST /control body; raises ValueError naming the first bad field.
+
+    Unless `allow_remote` is set, pose push targets must stay on this machine.
+    """
+    if not isinstance(body, dict) or not body:
+        raise ValueError("Body must be a non-empty JSON object")
+    changes = {}
+    for key, value in body.items():
+        parse = CONTROL_FIELDS.get(key)
+        if parse is None:
+            raise ValueError(f"Unknown setting: {key}")
+        try:
+            changes[key] = parse(value)
+        except (OverflowError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid {key}: {e}")
+    if not allow_remote:
+        targets = {"http_url": urllib.parse.urlsplit(changes.get("http_url", "")).hostname, "udp_host": changes.get("udp_host")}
+        for key, host in targets.items():
+            if key in changes and not is_loopback_host(host):
+                raise ValueError(f"Invalid {key}: must point to this machine (see --allow-remote-targets)")
+    return changes
+
+
+class TrackerControl:
+    """Hands validated setting changes from listener threads to the tracking loop.
+
+    Changes submitted between two frames are merged and applied together at the
+    top of the next loop iteration, so a frame never sees a half-applied change.
+    """
+
+    def __init__(self, allow_remote=False):
+        self._lock = threading.Lock()
+        self._allow_remote = allow_remote
+        self._wake = threading.Event()
+        self._pending = {}
+        self._tickets = []
+        self._settings = {}
+        self._last_error = None
+
+    def submit(self, body):
+        changes = validate_control_changes(body, self._allow_remote)
+        ticket = {"event": threading.Event(), "error": None}
+        with self._lock:
+            self._pending.update(changes)
+            self._tickets.append(ticket)
+            self._wake.set()
+        return ticket
+
+    def take(self):
+        with self._lock:
+            changes, tickets = self._pending, self._tickets
+            self._pending, self._tickets = {}, []
+            self._wake.clear()
+        return changes, tickets
+
+    def wait(self, timeout):
+        """Sleep up to `timeout` seconds, returning early once a change is submitted."""
+        return self._wake.wait(timeout)
+
+    def finish(self, tickets, error=None):
+        with self._lock:
+            self._last_error = error
+        for ticket in tickets:
+            ticket["error"] = error
+            ticket["event"].set()
+
+    def publish(self, settings):
+        with self._lock:
+            self._settings = dict(settings)
+
+    def snapshot(self):
+        with self._lock:
+            return {"settings": dict(self._settings), "last_error": self._last_error}
+
+
+def current_settings(args, runtime, pose_calibrator):
+    process_noise, measurement_noise = pose_calibrator.get_smoothing()
+    return {
+        "camera_index": runtime["camera_index"],
+        "camera_backend": runtime["backend_name"],
+        "transport": args.transport,
+        "http_url": args.http_url,
+        "http_method": args.http_method,
+        "udp_host": args.udp_host,
+        "udp_port": args.udp_port,
+        "inference_fps": args.inference_fps,
+        "ik_process_noise": process_noise,
+        "ik_measurement_noise": measurement_noise,
+        "debug": args.debug,
+        "debug_interval": args.debug_interval,
+    }
+
 
-def setup_logging(log_file):
+def apply_control_changes(changes, args, runtime, registry, pose_calibrator, cameras):
+    """Apply validated changes between frames; raises ValueError and changes nothing if the camera cannot be opened."""
+    camera_index = changes.get("camera_index", runtime["camera_index"])
+    if camera_index != runtime["camera_index"]:
+        device_name = next((cam["name"] for cam in cameras if cam["index"] == camera_index), f"Camera {camera_index}")
+        cap, backend_name = open_selected_camera(camera_index, build_capture_config(args, device_name))
+        if cap is None:
+            raise ValueError(f"Could not open camera index {camera_index}")
+        runtime["cap"].release()
+        runtime.update(cap=cap, backend_name=backend_name, camera_index=camera_index)
+
+    if args.transport == "udp":
+        for fmt in ("pose", "ik"):
+            registry.unsubscribe((args.udp_host, args.udp_port), fmt)
+    for key in ("transport", "http_url", "http_method", "udp_host", "udp_port", "inference_fps", "debug", "debug_interval"):
+        if key in changes:
+            setattr(args, key, changes[key])
+    if args.transport == "udp":
+        for fmt in ("pose", "ik"):
+            registry.subscribe((args.udp_host, args.udp_port), fmt, persistent=True)
+        if runtime["sock"] is None:
+            runtime["sock"] = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    pose_calibrator.set_smoothing(changes.get("ik_process_noise"), changes.get("ik_measurement_noise"))
+    logger.info("Control: applied %s", changes)
+
+
+class SampledRateLimitFilter(logging.Filter):
+    """Keep one record in `sample_every`, then at most `rate` per second.
+
+    Dropped records are counted and the count is appended to the next record
+    that gets through, so bursts stay visible in the log without being written.
+    """
+
+    def __init__(self, rate=None, sample_every=1, burst=None):
+        super().__init__()
+        self._lock = threading.Lock()
+        self.rate = rate
+        self.sample_every = max(1, int(sample_every))
+        self.burst = float(burst if burst is not None else max(1.0, rate or 1.0))
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._seen = 0
+        self.suppressed = 0
+
+    def filter(self, record):
+        with self._lock:
+            self._seen += 1
+            if self._seen % self.sample_every:
+                self.suppressed += 1
+                return False
+            if self.rate is not None:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens < 1.0:
+                    self.suppressed += 1
+                    return False
+                self._tokens -= 1.0
+            suppressed, self.suppressed = self.suppressed, 0
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar suppressed)"
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the writer falls behind."""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def configure_log_category(category_logger, rate=None, sample_every=1, enabled=True):
+    category_logger.filters.clear()
+    category_logger.disabled = not enabled
+    if rate is not None or sample_every > 1:
+        category_logger.addFilter(SampledRateLimitFilter(rate, sample_every))
+
+
+def setup_logging(log_file, max_bytes=DEFAULT_LOG_MAX_BYTES, backups=DEFAULT_LOG_BACKUPS):
+    """Route all tracker logging through a background writer thread.
+
+    Callers only format and enqueue a record; the QueueListener thread does the
+    file and console I/O. The file is rotated once it reaches `max_bytes`
+    (0 disables rotation). Returns the started listener; stop it on shutdown so
+    queued records are flushed.
+    """
     log_dir = os.path.dirname(log_file)
     if log_dir:
         os.makedirs(log_dir, exist_ok=True)
 
     formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
-    file_handler = logging.FileHandler(log_file, encoding="utf-8")
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+    )
     file_handler.setFormatter(formatter)
     stream_handler = logging.StreamHandler()
     stream_handler.setFormatter(formatter)
 
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, stream_handler, respect_handler_level=True
+    )
+
     logger.setLevel(logging.INFO)
     logger.handlers.clear()
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
+    logger.addHandler(DroppingQueueHandler(log_queue))
     logger.propagate = False
+    listener.start()
+    return listener
+
+# Virtual camera frame protocol. Legacy senders use an 8-byte header (width, height)
+# followed by RGB8 pixels. Versioned senders start with FRAME_MAGIC and name the pixel format.
+FRAME_MAGIC = b"AVCF"
+FRAME_VERSION = 3
+FRAME_HEADER_V2 = struct.Struct("<4sHHII")  # magic, version, pixel format, width, height
+FRAME_HEADER_V3 = struct.Struct("<4sHHIII")  # v2 + pose frame sequence echoed by the sender
+PIXEL_FORMAT_RGB = 0
+PIXEL_FORMAT_RGBA = 1
+PIXEL_FORMAT_I420 = 2
+PIXEL_FORMAT_NV12 = 3
+PIXEL_FORMAT_NAMES = {
+    PIXEL_FORMAT_RGB: "RGB",
+    PIXEL_FORMAT_RGBA: "RGBA",
+    PIXEL_FORMAT_I420: "I420",
+    PIXEL_FORMAT_NV12: "NV12",
+}
+VCAM_LAYOUTS = ("single", "side_by_side", "pip", "overlay")
+
+
+def frame_size(pixel_format, width, height):
+    if pixel_format == PIXEL_FORMAT_RGB:
+        return width * height * 3
+    if pixel_format == PIXEL_FORMAT_RGBA:
+        return width * height * 4
+    if pixel_format in (PIXEL_FORMAT_I420, PIXEL_FORMAT_NV12):
+        if width % 2 or height % 2:
+            raise ValueError(f"{PIXEL_FORMAT_NAMES[pixel_format]} requires even dimensions, got {width}x{height}")
+        return width * height * 3 // 2
+    raise ValueError(f"Unknown pixel format: {pixel_format}")
+
+
+def _recv_exact(conn, view):
+    """Fill `view` from the socket; returns False if the peer closed first."""
+    received = 0
+    while received < len(view):
+        n = conn.recv_into(view[received:])
+        if not n:
+            return False
+        received += n
+    return True
+
+
+def read_frame_header(conn):
+    """Return (pixel_format, width, height, frame_seq), or None when the connection closed.
+
+    frame_seq is the tracker camera frame the sender rendered from, or None for
+    headers older than version 3.
+    """
+    header = bytearray(FRAME_HEADER_V3.size)
+    view = memoryview(header)
+    if not _recv_exact(conn, view[:8]):
+        return None
+
+    if header[:4] != FRAME_MAGIC:
+        width = int.from_bytes(header[0:4], byteorder="little")
+        height = int.from_bytes(header[4:8], byteorder="little")
+        return PIXEL_FORMAT_RGB, width, height, None
 
-def virtual_camera_loop():
+    version = int.from_bytes(header[4:6], byteorder="little")
+    if version == 2:
+        if not _recv_exact(conn, view[8:FRAME_HEADER_V2.size]):
+            return None
+        _, _, pixel_format, width, height = FRAME_HEADER_V2.unpack_from(header)
+        return pixel_format, width, height, None
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported frame header version: {version}")
+    if not _recv_exact(conn, view[8:]):
+        return None
+    _, _, pixel_format, width, height, frame_seq = FRAME_HEADER_V3.unpack(header)
+    return pixel_format, width, height, frame_seq
+
+
+def yuv420_to_rgb(data, width, height, pixel_format):
+    """Convert a planar I420 or semi-planar NV12 buffer to an (h, w, 3) RGB array (BT.601, limited range)."""
+    luma_size = width * height
+    y = data[:luma_size].reshape(height, width).astype(np.float32) - 16.0
+    if pixel_format == PIXEL_FORMAT_I420:
+        chroma_size = luma_size // 4
+        u = data[luma_size:luma_size + chroma_size].reshape(height // 2, width // 2)
+        v = data[luma_size + chroma_size:luma_size + 2 * chroma_size].reshape(height // 2, width // 2)
+    else:
+        uv = data[luma_size:luma_size * 3 // 2].reshape(height // 2, width // 2, 2)
+        u = uv[..., 0]
+        v = uv[..., 1]
+
+    u = u.repeat(2, axis=0).repeat(2, axis=1).astype(np.float32) - 128.0
+    v = v.repeat(2, axis=0).repeat(2, axis=1).astype(np.float32) - 128.0
+    y *= 1.164
+    rgb = np.empty((height, width, 3), dtype=np.float32)
+    rgb[..., 0] = y + 1.596 * v
+    rgb[..., 1] = y - 0.392 * u - 0.813 * v
+    rgb[..., 2] = y + 2.017 * u
+    return np.clip(rgb, 0.0, 255.0, out=rgb).astype(np.uint8)
+
+
+def open_virtual_camera(pyvirtualcam, width, height, pixel_format, fps=30):
+    """Open a camera in the sender's format if the backend supports it, else in RGB.
+
+    Returns (camera, native) where `native` tells whether frames can be passed through unchanged.
+    """
+    if pixel_format != PIXEL_FORMAT_RGB:
+        native_fmt = getattr(pyvirtualcam.PixelFormat, PIXEL_FORMAT_NAMES[pixel_format])
+        try:
+            return pyvirtualcam.Camera(width=width, height=height, fps=fps, fmt=native_fmt), True
+        except Exception as e:
+            logger.info(
+                "Virtual Camera backend does not accept %s (%s); converting to RGB.",
+                PIXEL_FORMAT_NAMES[pixel_format],
+                e,
+            )
+    return pyvirtualcam.Camera(width=width, height=height, fps=fps), pixel_format == PIXEL_FORMAT_RGB
+
+
+def frame_for_camera(data, pixel_format, width, height, native):
+    if pixel_format in (PIXEL_FORMAT_I420, PIXEL_FORMAT_NV12):
+        return data if native else yuv420_to_rgb(data, width, height, pixel_format)
+    channels = 4 if pixel_format == PIXEL_FORMAT_RGBA else 3
+    frame = data.reshape((height, width, channels))
+    return frame if native else frame[..., :3]
+
+
+class FrameSlot:
+    """Latest frame from one sender connection, triple buffered.
+
+    The receiver thread fills a buffer nobody else holds and then publishes it
+    under `lock`. The output thread only takes a reference to the published
+    buffer under the lock (see frame()), so decoding and scaling never block
+    the receiver, and a slow sender only ever delays itself.
+    """
+
+    BUFFER_COUNT = 3
+
+    def __init__(self, addr):
+        self.addr = addr
+        self.lock = threading.Lock()
+        self.data = None
+        self.pixel_format = None
+        self.width = 0
+        self.height = 0
+        self.updated = None
+        self.frame_seq = None
+        self._buffers = []
+        self._reading = None
+
+    def writable(self, size):
+        """A (size,) uint8 buffer that is neither published nor being read."""
+        with self.lock:
+            if self._buffers and self._buffers[0].size != size:
+                self._buffers = []
+            for buffer in self._buffers:
+                if buffer is not self.data and buffer is not self._reading:
+                    return buffer
+            buffer = np.empty(size, dtype=np.uint8)
+            if len(self._buffers) < self.BUFFER_COUNT:
+                self._buffers.append(buffer)
+            return buffer
+
+    def publish(self, buffer, pixel_format, width, height, frame_seq=None):
+        with self.lock:
+            self.data = buffer
+            self.pixel_format = pixel_format
+            self.width = width
+            self.height = height
+            self.frame_seq = frame_seq
+            self.updated = time.monotonic()
+
+    def store(self, buffer, pixel_format, width, height, frame_seq=None):
+        target = self.writable(buffer.size)
+        np.copyto(target, buffer)
+        self.publish(target, pixel_format, width, height, frame_seq)
+
+    @contextlib.contextmanager
+    def frame(self):
+        """Yield the latest frame as a dict (or None); its buffer is not reused until the block exits."""
+        with self.lock:
+            if self.data is None:
+                frame = None
+            else:
+                self._reading = self.data
+                frame = {
+                    "data": self.data,
+                    "pixel_format": self.pixel_format,
+                    "width": self.width,
+                    "height": self.height,
+                    "frame_seq": self.frame_seq,
+                }
+        try:
+            yield frame
+        finally:
+            with self.lock:
+                self._reading = None
+
+
+@functools.lru_cache(maxsize=32)
+def _scale_indices(src_h, src_w, dst_h, dst_w):
+    rows = (np.arange(dst_h) * src_h // dst_h).astype(np.intp)
+    cols = (np.arange(dst_w) * src_w // dst_w).astype(np.intp)
+    return rows[:, None], cols[None, :]
+
+
+def _frame_pixels(frame):
+    """Return a FrameSlot.frame() dict as (h, w, 3|4) pixels without copying unless it is YUV."""
+    if frame["pixel_format"] in (PIXEL_FORMAT_I420, PIXEL_FORMAT_NV12):
+        return yuv420_to_rgb(frame["data"], frame["width"], frame["height"], frame["pixel_format"])
+    return frame_for_camera(frame["data"], frame["pixel_format"], frame["width"], frame["height"], native=True)
+
+
+class VirtualCameraCompositor:
+    """Combines the latest frames of several senders into one RGB output.
+
+    Layouts:
+      single        - the first connected source only, passed through unchanged
+      side_by_side  - sources split the output width equally
+      pip           - first source full frame, the others as quarter-size insets bottom-right
+      overlay       - sources stacked full frame, blended by their alpha (RGBA) or 50% (RGB/YUV)
+    """
+
+    def __init__(self, layout="single", stale_after=2.0):
+        if layout not in VCAM_LAYOUTS:
+            raise ValueError(f"Unknown layout: {layout}")
+        self.layout = layout
+        self._stale_after = stale_after
+        self._lock = threading.Lock()
+        self._sources = []
+        # Overlay scratch space; compose() only runs on the virtual camera thread.
+        self._blend = None
+
+    def add_source(self, addr):
+        slot = FrameSlot(addr)
+        with self._lock:
+            self._sources.append(slot)
+        return slot
+
+    def remove_source(self, slot):
+        with self._lock:
+            if slot in self._sources:
+                self._sources.remove(slot)
+
+    def live_sources(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            sources = list(self._sources)
+        return [s for s in sources if s.updated is not None and now - s.updated <= self._stale_after]
+
+    def regions(self, count, width, height):
+        """(x, y, w, h) output rectangle for each of `count` sources."""
+        if self.layout == "single":
+            return [(0, 0, width, height)][:count]
+        if self.layout == "overlay":
+            return [(0, 0, width, height)] * count
+        if self.layout == "side_by_side":
+            edges = [i * width // count for i in range(count + 1)]
+            return [(edges[i], 0, edges[i + 1] - edges[i], height) for i in range(count)]
+
+        inset_w, inset_h = width // 4, height // 4
+        margin = max(2, width // 64)
+        regions = [(0, 0, width, height)]
+        for i in range(1, count):
+            y = height - i * (inset_h + margin)
+            if y < 0:
+                break
+            regions.append((width - inset_w - margin, y, inset_w, inset_h))
+        return regions
+
+    def compose(self, out, sources):
+        """Blend `sources` into the preallocated (h, w, 3) uint8 `out` buffer.
+
+        Returns the frame_seq of every source that was actually drawn; sources the
+        layout has no room for are left out.
+        """
+        height, width = out.shape[:2]
+        out.fill(0)
+        drawn = []
+        for index, (slot, (x, y, w, h)) in enumerate(zip(sources, self.regions(len(sources), width, height))):
+            target = out[y:y + h, x:x + w]
+            with slot.frame() as frame:
+                if frame is None:
+                    continue
+                drawn.append(frame["frame_seq"])
+                pixels = _frame_pixels(frame)
+                if pixels.shape[:2] != (h, w):
+                    rows, cols = _scale_indices(pixels.shape[0], pixels.shape[1], h, w)
+                    pixels = pixels[rows, cols]
+
+                if self.layout != "overlay" or index == 0:
+                    target[...] = pixels[..., :3]
+                    continue
+
+                # target += (pixels - target) * alpha, in float32 scratch buffers reused across frames.
+                blend, alpha = self._blend_buffers(h, w)
+                if pixels.shape[2] == 4:
+                    np.multiply(pixels[..., 3:4], np.float32(1.0 / 255.0), out=alpha)
+                else:
+                    alpha.fill(0.5)
+                np.subtract(pixels[..., :3], target, out=blend, dtype=np.float32)
+                np.multiply(blend, alpha, out=blend)
+                np.add(blend, target, out=blend)
+                np.rint(blend, out=blend)
+                np.copyto(target, blend, casting="unsafe")
+        return drawn
+
+    def _blend_buffers(self, height, width):
+        if self._blend is None or self._blend[0].shape[:2] != (height, width):
+            self._blend = (
+                np.empty((height, width, 3), dtype=np.float32),
+                np.empty((height, width, 1), dtype=np.float32),
+            )
+        return self._blend
+
+
+def _receive_source(conn, addr, slot, compositor):
+    try:
+        with conn:
+            while True:
+                header = read_frame_header(conn)
+                if header is None:
+                    break
+                pixel_format, width, height, frame_seq = header
+                # Receive straight into a free slot buffer; publishing it is a reference swap.
+                buffer = slot.writable(frame_size(pixel_format, width, height))
+                if not _recv_exact(conn, memoryview(buffer)):
+                    break
+                slot.publish(buffer, pixel_format, width, height, frame_seq)
+    except Exception as e:
+        logger.warning("Virtual Camera source %s error: %s", addr, e)
+    finally:
+        compositor.remove_source(slot)
+        logger.info("Virtual Camera source %s disconnected.", addr)
+
+
+def _accept_sources(server_sock, compositor):
+    while True:
+        try:
+            conn, addr = server_sock.accept()
+        except socket.timeout:
+            continue
+        except OSError:
+            break
+        logger.info("Connected by %s", addr)
+        slot = compositor.add_source(addr)
+        threading.Thread(target=_receive_source, args=(conn, addr, slot, compositor), daemon=True).start()
+
+
+def virtual_camera_loop(layout="single", width=None, height=None, fps=30, latency_tracker=None):
     try:
         import pyvirtualcam
     except ImportError:
@@ -120,81 +1226,99 @@ def virtual_camera_loop():
     server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     server_sock.bind(("127.0.0.1", VIRTUAL_CAM_PORT))
-    server_sock.listen(1)
+    server_sock.listen(8)
     server_sock.settimeout(1.0) # Check for exit signal periodically
 
-    logger.info("Virtual Camera listener started on TCP port %s", VIRTUAL_CAM_PORT)
+    logger.info("Virtual Camera listener started on TCP port %s (layout=%s)", VIRTUAL_CAM_PORT, layout)
+
+    compositor = VirtualCameraCompositor(layout)
+    threading.Thread(target=_accept_sources, args=(server_sock, compositor), daemon=True).start()
 
     cam = None
+    cam_mode = None
+    native = False
+    out = None
+    # Composite output keeps one size for the lifetime of the listener so a source
+    # joining, leaving or resizing never restarts the virtual camera device.
+    composite_size = (width, height) if width and height else None
 
     try:
         while True:
-            try:
-                conn, addr = server_sock.accept()
-                logger.info("Connected by %s", addr)
-
-                with conn:
-                    while True:
-                        # Read width (4 bytes) and height (4 bytes)
-                        header_data = b''
-                        while len(header_data) < 8:
-                            packet = conn.recv(8 - len(header_data))
-                            if not packet:
-                                break
-                            header_data += packet
-
-                        if not header_data:
-                            break
-
-                        width = int.from_bytes(header_data[0:4], byteorder='little')
-                        height = int.from_bytes(header_data[4:8], byteorder='little')
-
-                        size = width * height * 3
-
-                        # Read image data
-                        img_data = b''
-                        while len(img_data) < size:
-                            packet = conn.recv(size - len(img_data))
-                            if not packet:
-                                break
-                            img_data += packet
-
-                        if len(img_data) != size:
-                            break
-
-                        try:
-                            frame = np.frombuffer(img_data, dtype=np.uint8)
-                            frame = frame.reshape((height, width, 3))
-
-                            h, w, c = frame.shape
-
-                        except Exception as e:
-                            logger.warning("Frame decode error: %s", e)
-                            continue
-
-                        # Update camera if resolution changed
-                        if cam is not None and (cam.width != w or cam.height != h):
-                            logger.info(
-                                "Resolution changed from %sx%s to %sx%s. Restarting Virtual Camera.",
-                                cam.width,
-                                cam.height,
-                                w,
-                                h,
-                            )
-                            cam.close()
-                            cam = None
-
-                        if cam is None:
-                            cam = pyvirtualcam.Camera(width=w, height=h, fps=30)
-                            logger.info("Virtual Camera started: %sx%s @ %sfps", w, h, cam.fps)
-
-                        cam.send(frame)
-                        cam.sleep_until_next_frame()
-
-            except socket.timeout:
+            sources = compositor.live_sources()
+            if not sources:
+                time.sleep(1.0 / fps)
                 continue
+
+            primary = sources[0]
+            if layout == "single":
+                # Pass the sender's pixels straight through in its own format when possible.
+                mode = (primary.width, primary.height, primary.pixel_format)
+            else:
+                if composite_size is None:
+                    composite_size = (width or primary.width, height or primary.height)
+                mode = (composite_size[0], composite_size[1], PIXEL_FORMAT_RGB)
+
+            # Update camera if resolution or pixel format changed
+            if cam is not None and cam_mode != mode:
+                logger.info(
+                    "Frame mode changed from %sx%s %s to %sx%s %s. Restarting Virtual Camera.",
+                    cam_mode[0],
+                    cam_mode[1],
+                    PIXEL_FORMAT_NAMES[cam_mode[2]],
+                    mode[0],
+                    mode[1],
+                    PIXEL_FORMAT_NAMES[mode[2]],
+                )
+                cam.close()
+                cam = None
+
+            if cam is None:
+                try:
+                    cam, native = open_virtual_camera(pyvirtualcam, mode[0], mode[1], mode[2], fps)
+                except Exception as e:
+                    # Keep accepting senders; the backend may come up later or the mode may change.
+                    logger.warning(
+                        "Could not start Virtual Camera at %sx%s %s: %s. Retrying in %ss.",
+                        mode[0],
+                        mode[1],
+                        PIXEL_FORMAT_NAMES[mode[2]],
+                        e,
+                        VCAM_RETRY_S,
+                    )
+                    time.sleep(VCAM_RETRY_S)
+                    continue
+                cam_mode = mode
+                logger.info(
+                    "Virtual Camera started: %sx%s @ %sfps (%s%s)",
+                    mode[0],
+                    mode[1],
+                    cam.fps,
+                    PIXEL_FORMAT_NAMES[mode[2]],
+                    "" if native else " -> RGB",
+                )
+
+            try:
+                # Only frames that reached cam.send() count towards glass-to-glass latency.
+                sent = []
+                if layout == "single":
+                    with primary.frame() as frame:
+                        if frame is not None and (frame["width"], frame["height"], frame["pixel_format"]) == mode:
+                            cam.send(frame_for_camera(frame["data"], mode[2], mode[0], mode[1], native))
+                            sent = [frame["frame_seq"]]
+                else:
+                    if out is None or out.shape[:2] != (mode[1], mode[0]):
+                        out = np.zeros((mode[1], mode[0], 3), dtype=np.uint8)
+                    drawn = compositor.compose(out, sources)
+                    cam.send(out)
+                    sent = drawn
+                if latency_tracker is not None:
+                    now = time.perf_counter()
+                    for frame_seq in sent:
+                        latency_tracker.record_output(frame_seq, now)
             except Exception as e:
-                logger.warning("Virtual Camera Connection Error: %s", e)
+                logger.warning("Frame decode error: %s", e)
+
+            cam.sleep_until_next_frame()
 
     except KeyboardInterrupt:
         pass
@@ -209,20 +1333,46 @@ def build_parser():
     parser.add_argument("--debug", action="store_true", help="Print periodic pose debug output to console")
     parser.add_argument("--debug-interval", type=float, default=1.0, help="Seconds between debug prints")
     parser.add_argument("--no-virtual-cam", action="store_true", help="Disable virtual camera TCP listener thread")
+    parser.add_argument("--vcam-layout", choices=VCAM_LAYOUTS, default="single", help="How multiple virtual camera senders are combined")
+    parser.add_argument("--vcam-width", type=int, default=None, help="Composited virtual camera width (default: first sender's width, kept while running)")
+    parser.add_argument("--vcam-height", type=int, default=None, help="Composited virtual camera height (default: first sender's height, kept while running)")
+    parser.add_argument("--vcam-fps", type=float, default=30.0, help="Virtual camera output frame rate")
     parser.add_argument("--camera-index", type=int, default=None, help="OpenCV camera index to use")
     parser.add_argument("--list-cameras", action="store_true", help="List available cameras and exit")
     parser.add_argument("--select-camera", action="store_true", help="Interactively select camera index from a list, then start")
     parser.add_argument("--pick-camera", action="store_true", help="Alias for --select-camera")
+    parser.add_argument("--capture-width", type=int, default=None, help="Requested camera frame width")
+    parser.add_argument("--capture-height", type=int, default=None, help="Requested camera frame height")
+    parser.add_argument("--capture-fps", type=float, default=None, help="Requested camera frame rate")
+    parser.add_argument("--capture-codec", choices=CAPTURE_CODECS, default=None, help="Requested camera FOURCC")
+    parser.add_argument("--capture-buffer-size", type=int, default=1, help="Driver frame queue length (0 keeps backend default)")
+    parser.add_argument("--auto-mode", action="store_true", help="Measure candidate capture modes and use the best one (cached per device)")
+    parser.add_argument("--auto-mode-refresh", action="store_true", help="Ignore the cached capture mode and measure again")
+    parser.add_argument("--capture-cache-file", default=DEFAULT_CAPTURE_CACHE_FILE, help="Path to the per-device capture mode cache")
     parser.add_argument("--log-file", default=DEFAULT_LOG_FILE, help="Path to log file")
-    parser.add_argument("--transport", choices=["http", "udp", "none"], default="http", help="Pose output transport")
+    parser.add_argument("--log-max-bytes", type=int, default=DEFAULT_LOG_MAX_BYTES, help="Rotate the log file at this size (0 = never rotate)")
+    parser.add_argument("--log-backups", type=int, default=DEFAULT_LOG_BACKUPS, help="Number of rotated log files to keep")
+    parser.add_argument("--no-access-log", action="store_true", help="Do not log HTTP listener requests")
+    parser.add_argument("--access-log-sample", type=int, default=1, help="Log one HTTP request in N")
+    parser.add_argument("--access-log-rate", type=float, default=5.0, help="Maximum HTTP request log lines per second (0 = unlimited)")
+    parser.add_argument("--frame-log-rate", type=float, default=1.0, help="Maximum per-frame warning log lines per second (0 = unlimited)")
+    parser.add_argument("--transport", choices=TRANSPORTS, default="http", help="Pose output transport")
+    parser.add_argument("--udp-host", default=UDP_IP, help="Target host for --transport udp")
+    parser.add_argument("--udp-port", type=int, default=UDP_PORT, help="Target port for --transport udp")
+    parser.add_argument("--inference-fps", type=float, default=0.0, help="Maximum pose inference rate (0 = as fast as the camera delivers)")
     parser.add_argument("--http-url", default=DEFAULT_HTTP_URL, help="HTTP endpoint URL")
     parser.add_argument("--http-method", choices=["get", "post"], default="get", help="HTTP method for pose upload")
     parser.add_argument("--http-query-param", default="data", help="Query parameter name used for JSON payload in GET mode")
     parser.add_argument("--http-timeout", type=float, default=0.2, help="HTTP timeout in seconds")
+    parser.add_argument("--shm-file", default=None, help="Also publish the latest pose into this memory-mapped file (see pose_shm.py)")
     parser.add_argument("--listen-http", action="store_true", help="Run local HTTP listener that serves latest pose JSON")
     parser.add_argument("--listen-host", default="127.0.0.1", help="Listener host for local HTTP server")
     parser.add_argument("--listen-port", type=int, default=40094, help="Listener port for local HTTP server")
     parser.add_argument("--listen-path", default="/pose", help="Listener endpoint path for pose JSON")
+    parser.add_argument("--allow-remote-targets", action="store_true", help="Let /control and /subscribe send poses to hosts other than this machine")
+    parser.add_argument("--subscribe-host", default="127.0.0.1", help="Host for the UDP HELLO/BYE subscription listener")
+    parser.add_argument("--subscribe-port", type=int, default=SUBSCRIBE_PORT, help="Port for the UDP subscription listener (0 disables)")
+    parser.add_argument("--ik-all-joints", action="store_true", help="Include offsets for all 33 joints in UDP IK messages, not only the 4 IK targets")
     return parser
 
 
@@ -293,7 +1443,176 @@ def choose_camera_index(cameras):
         print("Index not in detected camera list.")
 
 
-def open_selected_camera(camera_index):
+CAPTURE_CODECS = ("MJPG", "YUYV")
+# Tried in order by --auto-mode; the best measured mode wins.
+CAPTURE_CANDIDATE_MODES = [
+    {"width": 1920, "height": 1080, "fps": 30, "codec": "MJPG"},
+    {"width": 1280, "height": 720, "fps": 60, "codec": "MJPG"},
+    {"width": 1280, "height": 720, "fps": 30, "codec": "MJPG"},
+    {"width": 1280, "height": 720, "fps": 30, "codec": "YUYV"},
+    {"width": 640, "height": 480, "fps": 30, "codec": "MJPG"},
+    {"width": 640, "height": 480, "fps": 30, "codec": "YUYV"},
+]
+
+
+def _fourcc(codec):
+    return sum(ord(c) << (8 * i) for i, c in enumerate(codec))
+
+
+def _fourcc_name(value):
+    value = int(value)
+    return "".join(chr((value >> (8 * i)) & 0xFF) for i in range(4)) if value > 0 else ""
+
+
+def build_capture_config(args, device_name):
+    return {
+        "mode": {
+            "width": args.capture_width,
+            "height": args.capture_height,
+            "fps": args.capture_fps,
+            "codec": args.capture_codec,
+        },
+        "buffer_size": args.capture_buffer_size,
+        "auto_mode": args.auto_mode,
+        "refresh": args.auto_mode_refresh,
+        "cache_file": args.capture_cache_file,
+        "device_name": device_name,
+    }
+
+
+def apply_capture_mode(cap, mode, buffer_size=None):
+    """Request a capture mode and return what the driver actually reports.
+
+    Keys set to None are left at the backend default. FOURCC is set first
+    because some backends only expose high resolutions for MJPEG.
+    """
+    if mode.get("codec"):
+        cap.set(cv2.CAP_PROP_FOURCC, _fourcc(mode["codec"]))
+    if mode.get("width"):
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode["width"])
+    if mode.get("height"):
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode["height"])
+    if mode.get("fps"):
+        cap.set(cv2.CAP_PROP_FPS, mode["fps"])
+    if buffer_size:
+        # Not every backend honours this; a small queue keeps only the newest frames.
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+
+    return {
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": float(cap.get(cv2.CAP_PROP_FPS)),
+        "codec": _fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)),
+    }
+
+
+def measure_capture_mode(cap, frames=30, warmup=5):
+    """Return the delivered fps and mean cap.read() latency in milliseconds."""
+    for _ in range(warmup):
+        cap.read()
+
+    read_time = 0.0
+    delivered = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        before = time.perf_counter()
+        success, _ = cap.read()
+        read_time += time.perf_counter() - before
+        if success:
+            delivered += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "fps": delivered / elapsed if elapsed > 0 else 0.0,
+        "read_ms": 1000.0 * read_time / frames if frames else 0.0,
+    }
+
+
+def auto_select_capture_mode(cap, candidates=CAPTURE_CANDIDATE_MODES, buffer_size=None, frames=30):
+    """Measure each candidate and return (requested_mode, measurement) for the best one.
+
+    Modes that deliver at least 90% of their requested fps win; among those the
+    largest resolution, then the highest fps and the lowest read latency.
+    """
+    best = None
+    best_score = None
+    for mode in candidates:
+        actual = apply_capture_mode(cap, mode, buffer_size)
+        if (actual["width"], actual["height"]) != (mode["width"], mode["height"]):
+            logger.info("Capture mode %s rejected by driver (got %s).", mode, actual)
+            continue
+        measured = measure_capture_mode(cap, frames=frames)
+        logger.info(
+            "Capture mode %sx%s@%s %s: %.1f fps, %.1f ms/read",
+            mode["width"],
+            mode["height"],
+            mode["fps"],
+            mode["codec"],
+            measured["fps"],
+            measured["read_ms"],
+        )
+        score = (
+            measured["fps"] >= 0.9 * mode["fps"],
+            mode["width"] * mode["height"],
+            round(measured["fps"]),
+            -measured["read_ms"],
+        )
+        if best_score is None or score > best_score:
+            best, best_score = (mode, measured), score
+    return best
+
+
+def load_capture_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_capture_cache(path, cache):
+    cache_dir = os.path.dirname(path)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+
+
+def configure_capture(cap, camera_index, backend_name, capture_config):
+    requested = capture_config["mode"]
+    buffer_size = capture_config["buffer_size"]
+
+    if capture_config["auto_mode"]:
+        device_key = f'{camera_index}:{capture_config["device_name"]}:{backend_name}'
+        cache = load_capture_cache(capture_config["cache_file"])
+        if device_key in cache and not capture_config["refresh"]:
+            requested = cache[device_key]
+            logger.info("Using cached capture mode for %s.", device_key)
+        else:
+            logger.info("Measuring capture modes for %s...", device_key)
+            selected = auto_select_capture_mode(cap, buffer_size=buffer_size)
+            if selected is not None:
+                requested = selected[0]
+                cache[device_key] = requested
+                try:
+                    save_capture_cache(capture_config["cache_file"], cache)
+                except OSError as e:
+                    logger.warning("Could not save capture mode cache: %s", e)
+            else:
+                logger.warning("No candidate capture mode worked; using backend defaults.")
+
+    actual = apply_capture_mode(cap, requested, buffer_size)
+    logger.info(
+        "Capture mode: %sx%s @ %.1f fps, codec=%s, buffer_size=%s",
+        actual["width"],
+        actual["height"],
+        actual["fps"],
+        actual["codec"] or "default",
+        buffer_size,
+    )
+    return actual
+
+
+def open_selected_camera(camera_index, capture_config=None):
     attempts = []
     if platform.system() == "Windows":
         attempts = [
@@ -308,6 +1627,8 @@ def open_selected_camera(camera_index):
         cap = opener()
         if cap.isOpened():
             logger.info("Opened camera index %s using %s backend.", camera_index, backend_name)
+            if capture_config is not None:
+                configure_capture(cap, camera_index, backend_name, capture_config)
             return cap, backend_name
         logger.warning("Open failed for camera index %s using %s backend.", camera_index, backend_name)
         cap.release()
@@ -319,18 +1640,44 @@ def _round6(value):
     return round(float(value), 6)
 
 
-def build_pose_payload(results):
-    named_landmarks = {}
-    for idx, landmark in enumerate(results.pose_landmarks.landmark):
-        if idx >= len(POSE_LANDMARK_NAMES):
-            continue
-        name = POSE_LANDMARK_NAMES[idx]
-        named_landmarks[name] = {
-            "x": _round6(landmark.x),
-            "y": _round6(landmark.y),
-            "z": _round6(landmark.z),
-            "visibility": _round6(landmark.visibility),
-        }
+def extract_landmark_array(results):
+    landmarks = results.pose_landmarks.landmark
+    return np.array(
+        [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks[:len(POSE_LANDMARK_NAMES)]],
+        dtype=np.float32,
+    )
+
+
+def mirror_landmarks(landmarks):
+    """Map (33, 4) landmarks from the camera image to the selfie view.
+
+    Equivalent to tracking a horizontally flipped frame: x becomes 1 - x and
+    left/right landmarks trade places.
+    """
+    mirrored = landmarks[POSE_MIRROR_INDICES]
+    mirrored[:, 0] = 1.0 - mirrored[:, 0]
+    return mirrored
+
+
+def to_rgb(image, buffer=None):
+    """Convert a BGR frame to RGB in `buffer`, allocating only when the frame shape changes.
+
+    The result is read-only so MediaPipe can take it by reference.
+    """
+    if buffer is None or buffer.shape != image.shape or buffer.dtype != image.dtype:
+        buffer = np.empty_like(image)
+    buffer.flags.writeable = True
+    cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=buffer)
+    buffer.flags.writeable = False
+    return buffer
+
+
+def build_pose_payload(landmarks, frame_seq=None, capture_ms=None):
+    rows = np.round(landmarks.astype(np.float64), 6).tolist()
+    named_landmarks = {
+        name: {"x": x, "y": y, "z": z, "visibility": visibility}
+        for name, (x, y, z, visibility) in zip(POSE_LANDMARK_NAMES, rows)
+    }
 
     segments = {}
     for segment_name, (start_name, end_name) in POSE_SEGMENTS.items():
@@ -345,21 +1692,32 @@ def build_pose_payload(results):
             "end_point": end,
         }
 
-    return {
+    payload = {
         "timestamp_ms": int(time.time() * 1000),
         "has_pose": True,
         "landmarks": named_landmarks,
         "segments": segments,
     }
+    _add_frame_info(payload, frame_seq, capture_ms)
+    return payload
 
 
-def build_no_pose_payload():
-    return {
+def build_no_pose_payload(frame_seq=None, capture_ms=None):
+    payload = {
         "timestamp_ms": int(time.time() * 1000),
         "has_pose": False,
         "landmarks": {},
         "segments": {},
     }
+    _add_frame_info(payload, frame_seq, capture_ms)
+    return payload
+
+
+def _add_frame_info(payload, frame_seq, capture_ms):
+    if frame_seq is not None:
+        payload["frame_seq"] = frame_seq
+    if capture_ms is not None:
+        payload["capture_ms"] = capture_ms
 
 
 def send_http_pose(payload, args):
@@ -387,20 +1745,109 @@ def send_http_pose(payload, args):
         return
 
 
-def send_udp_pose(payload, sock):
-    message = json.dumps(payload, separators=(",", ":")).encode("utf-8")
-    sock.sendto(message, (UDP_IP, UDP_PORT))
+def encode_landmark_message(landmarks):
+    # Binary layout matches MediaPipeBridge.gd: 33 x (x, y, z, visibility) float32.
+    return np.ascontiguousarray(landmarks, dtype="<f4").tobytes()
+
 
+def encode_pose_message(landmarks, frame_seq):
+    # Landmark message prefixed with the camera frame sequence for latency tracking.
+    return POSE_MESSAGE_HEADER.pack(POSE_MESSAGE_MAGIC, frame_seq & 0xFFFFFFFF) + encode_landmark_message(landmarks)
 
-def start_pose_http_listener(args, pose_state):
+
+def fan_out_pose(sock, due, encoders):
+    """Encode each requested format once and send it to every due subscriber."""
+    # sendmsg is unavailable on Windows sockets.
+    sendmsg = getattr(sock, "sendmsg", None)
+    for fmt, addrs in due.items():
+        message = encoders[fmt]()
+        if message is None:
+            continue
+        buffers = [message]
+        for addr in addrs:
+            try:
+                if sendmsg is not None:
+                    sendmsg(buffers, (), 0, addr)
+                else:
+                    sock.sendto(message, addr)
+            except OSError as e:
+                frame_logger.warning("Pose send to %s:%s failed: %s", addr[0], addr[1], e)
+
+
+def parse_subscription_datagram(data):
+    """Parse "HELLO [format] [max_rate]" or "BYE [format]"; returns (command, format, max_rate) or None."""
+    parts = data.decode("ascii", errors="replace").split()
+    if not parts or parts[0].upper() not in ("HELLO", "BYE"):
+        return None
+    command = parts[0].upper()
+    fmt = parts[1].lower() if len(parts) > 1 else ("binary" if command == "HELLO" else None)
+    try:
+        max_rate = float(parts[2]) if len(parts) > 2 else 0.0
+    except ValueError:
+        return None
+    return command, fmt, max_rate
+
+
+def subscription_listener_loop(sock, registry):
+    while True:
+        try:
+            data, addr = sock.recvfrom(512)
+        except socket.timeout:
+            continue
+        except OSError:
+            break
+
+        parsed = parse_subscription_datagram(data)
+        if parsed is None:
+            logger.warning("Ignoring invalid subscription datagram from %s:%s", addr[0], addr[1])
+            continue
+        command, fmt, max_rate = parsed
+        if command == "BYE":
+            registry.unsubscribe(addr, fmt)
+            continue
+        try:
+            registry.subscribe(addr, fmt, max_rate)
+        except ValueError as e:
+            logger.warning("Subscription from %s:%s rejected: %s", addr[0], addr[1], e)
+
+
+def start_subscription_listener(args, registry):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((args.subscribe_host, args.subscribe_port))
+    sock.settimeout(1.0)
+    thread = threading.Thread(target=subscription_listener_loop, args=(sock, registry), daemon=True)
+    thread.start()
+    logger.info("Subscription listener started on UDP %s:%s", args.subscribe_host, args.subscribe_port)
+    return sock
+
+
+def _query_float(query, name, default):
+    try:
+        return float(query.get(name, [default])[0])
+    except ValueError:
+        return None
+
+
+def _encode_pose_body(payload, features, updated_ms):
+    body = {"ok": True, "updated_ms": updated_ms, "pose": payload}
+    return json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+def _encode_features_body(payload, features, updated_ms):
+    body = {"ok": True, "updated_ms": updated_ms, "features": build_features_payload(features, payload["timestamp_ms"])}
+    return json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+def start_pose_http_listener(args, pose_state, pose_calibrator, registry, latency_tracker, control):
     listen_path = args.listen_path if args.listen_path.startswith("/") else f"/{args.listen_path}"
+    features_path = listen_path.rstrip("/") + "/features"
 
     class PoseHandler(BaseHTTPRequestHandler):
         def do_OPTIONS(self):
+            # Browsers may read pose data cross-origin but never get a preflight for POST.
             self.send_response(204)
             self.send_header("Access-Control-Allow-Origin", "*")
             self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
-            self.send_header("Access-Control-Allow-Headers", "Content-Type")
             self.end_headers()
 
         def do_GET(self):
@@ -421,32 +1868,134 @@ def start_pose_http_listener(args, pose_state):
                     self._write_json(404, {"error": "Viewer file not found", "path": DEFAULT_VIEWER_FILE})
                 return
 
+            if parsed.path == "/calibration":
+                self._write_json(200, build_ik_targets_body(pose_calibrator))
+                return
+            if parsed.path == "/subscribers":
+                self._write_json(200, {"ok": True, "subscribers": registry.snapshot()})
+                return
+            if parsed.path == "/latency":
+                self._write_json(200, {"ok": True, **latency_tracker.stats()})
+                return
+            if parsed.path == "/control":
+                self._write_json(200, {"ok": True, **control.snapshot()})
+                return
+
+            if parsed.path == features_path:
+                binary = urllib.parse.parse_qs(parsed.query).get("format", ["json"])[0] == "binary"
+                if binary:
+                    blob = pose_state.get_encoded("features.bin", lambda payload, features, updated_ms: encode_features_binary(features))
+                else:
+                    blob = pose_state.get_encoded("features", _encode_features_body)
+                if blob is None:
+                    self._write_json(503, {"error": "No pose data yet"})
+                    return
+                self._write_blob(200, blob, "application/octet-stream" if binary else "application/json")
+                return
+
             if parsed.path != listen_path:
                 self._write_json(404, {"error": "Not Found", "path": parsed.path})
                 return
 
-            payload, updated_ms = pose_state.get_snapshot()
-            if payload is None:
+            blob = pose_state.get_encoded("pose", _encode_pose_body)
+            if blob is None:
                 self._write_json(503, {"error": "No pose data yet"})
                 return
+            self._write_blob(200, blob)
 
-            self._write_json(
-                200,
-                {
-                    "ok": True,
-                    "updated_ms": updated_ms,
-                    "pose": payload,
-                },
-            )
+        def do_POST(self):
+            parsed = urllib.parse.urlsplit(self.path)
+            if parsed.path in ("/calibrate", "/calibrate/reset") and not self._require_json():
+                return
+            if parsed.path == "/calibrate":
+                if not pose_calibrator.calibrate():
+                    self._write_json(503, {"error": "No pose is being tracked"})
+                    return
+                logger.info("T-pose calibrated.")
+                self._write_json(200, build_ik_targets_body(pose_calibrator))
+                return
+            if parsed.path == "/calibrate/reset":
+                pose_calibrator.reset()
+                self._write_json(200, build_ik_targets_body(pose_calibrator))
+                return
+            if parsed.path in ("/subscribe", "/unsubscribe"):
+                self._handle_subscription(parsed)
+                return
+            if parsed.path == "/control":
+                self._handle_control()
+                return
+            self._write_json(404, {"error": "Not Found", "path": parsed.path})
+
+        def _require_json(self):
+            # A non-simple Content-Type forces a CORS preflight, which do_OPTIONS refuses for POST.
+            if self.headers.get_content_type() != "application/json":
+                self._write_json(415, {"error": "Content-Type must be application/json"})
+                return False
+            return True
+
+        def _handle_control(self):
+            if not self._require_json():
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                ticket = control.submit(json.loads(self.rfile.read(length) or b"null"))
+            except ValueError as e:
+                self._write_json(400, {"error": str(e)})
+                return
+
+            # Changes land between frames; wait briefly so the caller learns the outcome.
+            if not ticket["event"].wait(CONTROL_APPLY_TIMEOUT_S):
+                self._write_json(202, {"ok": True, "pending": True})
+                return
+            if ticket["error"]:
+                self._write_json(409, {"error": ticket["error"], **control.snapshot()})
+                return
+            self._write_json(200, {"ok": True, **control.snapshot()})
+
+        def _handle_subscription(self, parsed):
+            if not self._require_json():
+                return
+            query = urllib.parse.parse_qs(parsed.query)
+            port = _query_float(query, "port", 0)
+            if not port or not 0 < port < 65536:
+                self._write_json(400, {"error": "Missing or invalid port"})
+                return
+            host = query.get("host", [self.client_address[0]])[0]
+            if "host" in query and not args.allow_remote_targets and not is_loopback_host(host):
+                self._write_json(400, {"error": "host must point to this machine (see --allow-remote-targets)"})
+                return
+            addr = (host, int(port))
+            fmt = query.get("format", [None if parsed.path == "/unsubscribe" else "binary"])[0]
+
+            if parsed.path == "/unsubscribe":
+                registry.unsubscribe(addr, fmt)
+                self._write_json(200, {"ok": True, "subscribers": registry.snapshot()})
+                return
+
+            max_rate = _query_float(query, "max_rate", 0.0)
+            if max_rate is None:
+                self._write_json(400, {"error": "Invalid max_rate"})
+                return
+            try:
+                registry.subscribe(addr, fmt, max_rate)
+            except ValueError as e:
+                self._write_json(400, {"error": str(e)})
+                return
+            self._write_json(200, {"ok": True, "ttl_s": SUBSCRIBER_TTL_S, "subscribers": registry.snapshot()})
 
         def log_message(self, fmt, *values):
-            logger.info("HTTP listener: " + fmt, *values)
+            if args.no_access_log:
+                return
+            access_logger.info("HTTP listener: " + fmt, *values)
 
         def _write_json(self, status_code, body):
-            blob = json.dumps(body, separators=(",", ":")).encode("utf-8")
+            self._write_blob(status_code, json.dumps(body, separators=(",", ":")).encode("utf-8"))
+
+        def _write_blob(self, status_code, blob, content_type="application/json"):
             self.send_response(status_code)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Content-Type", content_type)
+            if self.command != "POST":
+                self.send_header("Access-Control-Allow-Origin", "*")
             self.send_header("Content-Length", str(len(blob)))
             self.end_headers()
             self.wfile.write(blob)
@@ -460,11 +2009,25 @@ def start_pose_http_listener(args, pose_state):
 
 def main():
     args = build_parser().parse_args()
-    setup_logging(args.log_file)
+    # Flush queued records on every exit path, including the early returns below.
+    atexit.register(setup_logging(args.log_file, args.log_max_bytes, args.log_backups).stop)
+    configure_log_category(
+        access_logger,
+        rate=args.access_log_rate or None,
+        sample_every=args.access_log_sample,
+        enabled=not args.no_access_log,
+    )
+    configure_log_category(frame_logger, rate=args.frame_log_rate or None)
     logger.info("Logging to %s", os.path.abspath(args.log_file))
     cameras = list_available_cameras()
     pose_state = PoseState()
+    pose_calibrator = PoseCalibrator()
+    registry = SubscriberRegistry()
+    latency_tracker = LatencyTracker()
+    control = TrackerControl(allow_remote=args.allow_remote_targets)
     pose_server = None
+    subscribe_sock = None
+    shm_writer = None
 
     if args.list_cameras:
         if not cameras:
@@ -484,24 +2047,43 @@ def main():
         camera_index = selected
 
     if args.listen_http:
-        pose_server = start_pose_http_listener(args, pose_state)
+        pose_server = start_pose_http_listener(args, pose_state, pose_calibrator, registry, latency_tracker, control)
+    if args.subscribe_port:
+        subscribe_sock = start_subscription_listener(args, registry)
+    if args.shm_file:
+        shm_writer = PoseShmWriter(args.shm_file)
+        logger.info("Publishing poses to shared memory file %s", os.path.abspath(args.shm_file))
 
     # Start Virtual Camera thread unless explicitly disabled for tracker-only debugging.
     if not args.no_virtual_cam:
-        vc_thread = threading.Thread(target=virtual_camera_loop, daemon=True)
+        vc_thread = threading.Thread(
+            target=virtual_camera_loop,
+            args=(args.vcam_layout, args.vcam_width, args.vcam_height, args.vcam_fps, latency_tracker),
+            daemon=True,
+        )
         vc_thread.start()
 
     mp_holistic = mp.solutions.holistic
     holistic = mp_holistic.Holistic(min_detection_confidence=0.6, min_tracking_confidence=0.7)
 
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) if args.transport == "udp" else None
-    cap, backend_name = open_selected_camera(camera_index)
+    if args.transport == "udp":
+        for fmt in ("pose", "ik"):
+            registry.subscribe((args.udp_host, args.udp_port), fmt, persistent=True)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) if args.transport == "udp" or args.subscribe_port else None
+    device_name = next((cam["name"] for cam in cameras if cam["index"] == camera_index), f"Camera {camera_index}")
+    cap, backend_name = open_selected_camera(camera_index, build_capture_config(args, device_name))
 
     if cap is None:
         logger.error("Could not open webcam at index %s with any backend.", camera_index)
         return
 
+    # State the control API may swap between frames.
+    runtime = {"cap": cap, "backend_name": backend_name, "camera_index": camera_index, "sock": sock}
+    control.publish(current_settings(args, runtime, pose_calibrator))
+
     frames = 0
+    frame_seq = 0
+    rgb_buffer = None
     last_debug_time = time.time()
     if args.transport == "http":
         logger.info(
@@ -512,36 +2094,63 @@ def main():
             args.http_url,
         )
     elif args.transport == "udp":
-        logger.info("Tracking started using camera index %s (%s), transport=udp %s:%s", camera_index, backend_name, UDP_IP, UDP_PORT)
+        logger.info("Tracking started using camera index %s (%s), transport=udp %s:%s", camera_index, backend_name, args.udp_host, args.udp_port)
     else:
         logger.info("Tracking started using camera index %s (%s), transport=none", camera_index, backend_name)
 
     try:
-        while cap.isOpened():
-            success, image = cap.read()
+        while runtime["cap"].isOpened():
+            changes, tickets = control.take()
+            if changes:
+                error = None
+                try:
+                    apply_control_changes(changes, args, runtime, registry, pose_calibrator, cameras)
+                except ValueError as e:
+                    error = str(e)
+                    logger.warning("Control: rejected %s: %s", changes, error)
+                control.publish(current_settings(args, runtime, pose_calibrator))
+                control.finish(tickets, error)
+
+            loop_start = time.perf_counter()
+            success, image = runtime["cap"].read()
             if not success:
-                logger.warning("Ignoring empty camera frame.")
+                frame_logger.warning("Ignoring empty camera frame.")
                 continue
+            frame_seq += 1
+            capture_time = time.perf_counter()
+            capture_ms = int(time.time() * 1000)
+            latency_tracker.record_capture(frame_seq, capture_time)
 
-            # Flip the image horizontally for a later selfie-view display, and convert
-            # the BGR image to RGB.
-            image = cv2.cvtColor(cv2.flip(image, 1), cv2.COLOR_BGR2RGB)
-            # To improve performance, optionally mark the image as not writeable to
-            # pass by reference.
-            image.flags.writeable = False
-            results = holistic.process(image)
+            # Track the unflipped frame; mirror_landmarks() applies the selfie view.
+            rgb_buffer = to_rgb(image, rgb_buffer)
+            results = holistic.process(rgb_buffer)
 
             if results.pose_landmarks:
-                payload = build_pose_payload(results)
-                pose_state.set_payload(payload)
-                if args.transport != "none":
+                landmarks = mirror_landmarks(extract_landmark_array(results))
+                payload = build_pose_payload(landmarks, frame_seq, capture_ms)
+                pose_state.set_payload(payload, compute_pose_features(landmarks))
+                if shm_writer is not None:
+                    shm_writer.publish(landmarks, frame_seq, capture_ms)
+                latency_tracker.record_sample("tracking", (time.perf_counter() - capture_time) * 1000.0)
+                ik_offsets = pose_calibrator.update(landmarks)
+                if args.transport == "http":
                     try:
-                        if args.transport == "http":
-                            send_http_pose(payload, args)
-                        else:
-                            send_udp_pose(payload, sock)
+                        send_http_pose(payload, args)
                     except Exception as e:
-                        logger.warning("Pose send failed: %s", e)
+                        frame_logger.warning("Pose send failed: %s", e)
+                if runtime["sock"] is not None:
+                    due = registry.collect_due()
+                    if due:
+                        fan_out_pose(
+                            runtime["sock"],
+                            due,
+                            {
+                                "binary": lambda: encode_landmark_message(landmarks),
+                                "pose": lambda: encode_pose_message(landmarks, frame_seq),
+                                "ik": lambda: None if ik_offsets is None else encode_ik_message(ik_offsets, args.ik_all_joints),
+                                "json": lambda: json.dumps(payload, separators=(",", ":")).encode("utf-8"),
+                            },
+                        )
 
                 if args.debug:
                     now = time.time()
@@ -549,11 +2158,7 @@ def main():
                         # Landmark 0 is nose in MediaPipe pose topology.
                         nose = payload["landmarks"]["nose"]
                         fps = frames / (now - last_debug_time) if now > last_debug_time else 0.0
-                        print(
-                            f"[debug] fps={fps:.1f} landmarks=33 "
-                            f"nose=(x={nose['x']:.3f}, y={nose['y']:.3f}, z={nose['z']:.3f}, vis={nose['visibility']:.3f})"
-                        )
-                        logger.info(
+                        debug_logger.info(
                             "[debug] fps=%.1f landmarks=33 nose=(x=%.3f, y=%.3f, z=%.3f, vis=%.3f)",
                             fps,
                             nose["x"],
@@ -564,10 +2169,16 @@ def main():
                         frames = 0
                         last_debug_time = now
             else:
-                pose_state.set_payload(build_no_pose_payload())
+                pose_state.set_payload(build_no_pose_payload(frame_seq, capture_ms))
+                if shm_writer is not None:
+                    shm_writer.publish(None, frame_seq, capture_ms)
 
-            # A small delay to prevent overwhelming the network and CPU
-            time.sleep(0.01)
+            # Pacing waits end early when a control change arrives, so it applies on the next frame.
+            if args.inference_fps > 0:
+                control.wait(max(0.0, loop_start + 1.0 / args.inference_fps - time.perf_counter()))
+            else:
+                # A small delay to prevent overwhelming the network and CPU
+                control.wait(0.01)
             frames += 1
 
     except KeyboardInterrupt:
@@ -578,13 +2189,17 @@ def main():
     finally:
         logger.info("Closing resources.")
         holistic.close()
-        cap.release()
-        if sock is not None:
-            sock.close()
+        runtime["cap"].release()
+        if runtime["sock"] is not None:
+            runtime["sock"].close()
+        if subscribe_sock is not None:
+            subscribe_sock.close()
         if pose_server is not None:
             pose_server.shutdown()
             pose_server.server_close()
             logger.info("HTTP listener stopped.")
+        if shm_writer is not None:
+            shm_writer.close()
 
 if __name__ == "__main__":
     main()
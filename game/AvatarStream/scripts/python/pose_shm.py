@@ -0,0 +1,177 @@
+"""Shared-memory pose channel for consumers on the same host.
+
+The tracker (``holistic_tracker.py --shm-file PATH``) keeps the newest pose in a
+small memory-mapped file. Readers map the file once and then read the pose
+without syscalls or decoding. The file uses a seqlock: the writer makes the
+sequence odd while it updates the pose and even again once it is done, so a
+reader that sees the same even sequence before and after copying got a
+consistent pose.
+
+Layout (little-endian, 560 bytes):
+
+    0   magic "APSM" (4s)
+    4   version (u16)
+    6   landmark count (u16)
+    8   sequence (u64), odd while a write is in progress; continues across
+        tracker restarts instead of starting over
+    16  capture_ms (i64), wall-clock capture time of the frame
+    24  frame_seq (u32), same value as in the JSON and UDP messages
+    28  flags (u32), bit 0 set when a pose was tracked in this frame
+    32  landmarks, count x (x, y, z, visibility) float32
+
+Usage:
+
+    reader = PoseShmReader(path)
+    pose = reader.read()
+    if pose is not None and pose["has_pose"]:
+        landmarks = pose["landmarks"]  # (33, 4) float32
+
+Run ``python pose_shm.py PATH`` to print poses as they arrive.
+"""
+import mmap
+import os
+import struct
+import sys
+import time
+import numpy as np
+
+SHM_MAGIC = b"APSM"
+SHM_VERSION = 1
+SHM_LANDMARK_COUNT = 33
+SHM_HEADER = struct.Struct("<4sHHQqII")
+SHM_SEQ_OFFSET = 8
+SHM_INFO = struct.Struct("<qII")
+SHM_INFO_OFFSET = 16
+SHM_LANDMARKS_OFFSET = SHM_HEADER.size
+SHM_SIZE = SHM_LANDMARKS_OFFSET + SHM_LANDMARK_COUNT * 4 * 4
+SHM_FLAG_HAS_POSE = 1
+
+
+class PoseShmWriter:
+    """Single writer for the pose file. Only the tracking loop calls publish()."""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, SHM_SIZE)
+            self._mm = mmap.mmap(fd, SHM_SIZE)
+        finally:
+            os.close(fd)
+        self.path = path
+        # Continue the sequence of a previous tracker run so readers holding an old
+        # sequence number never mistake a restarted channel for one they have seen.
+        magic, version, count, seq = SHM_HEADER.unpack_from(self._mm, 0)[:4]
+        if (magic, version, count) != (SHM_MAGIC, SHM_VERSION, SHM_LANDMARK_COUNT):
+            seq = 0
+        # An aligned 8-byte store through NumPy is a single write, so readers never
+        # see a torn sequence.
+        self._seq = np.ndarray((1,), dtype="<u8", buffer=self._mm, offset=SHM_SEQ_OFFSET)
+        self._landmarks = np.ndarray(
+            (SHM_LANDMARK_COUNT, 4), dtype="<f4", buffer=self._mm, offset=SHM_LANDMARKS_OFFSET
+        )
+        if seq == 0:
+            SHM_HEADER.pack_into(self._mm, 0, SHM_MAGIC, SHM_VERSION, SHM_LANDMARK_COUNT, 0, 0, 0, 0)
+            return
+        # Mark a write in progress (odd) while the header is reset; a previous run may
+        # have died mid-write, so its landmarks are published as "no pose".
+        self._seq[0] = seq | 1
+        SHM_HEADER.pack_into(self._mm, 0, SHM_MAGIC, SHM_VERSION, SHM_LANDMARK_COUNT, seq | 1, 0, 0, 0)
+        self._seq[0] = (seq | 1) + 1
+
+    def publish(self, landmarks, frame_seq=0, capture_ms=0):
+        """Publish (33, 4) landmarks, or None for a frame without a pose."""
+        seq = int(self._seq[0])
+        self._seq[0] = seq + 1
+        flags = 0
+        if landmarks is not None:
+            self._landmarks[:] = landmarks
+            flags = SHM_FLAG_HAS_POSE
+        SHM_INFO.pack_into(self._mm, SHM_INFO_OFFSET, int(capture_ms or 0), int(frame_seq or 0) & 0xFFFFFFFF, flags)
+        self._seq[0] = seq + 2
+
+    def close(self):
+        # The NumPy views export the mmap buffer and must go before it can close.
+        self._seq = None
+        self._landmarks = None
+        self._mm.close()
+
+
+class PoseShmReader:
+    def __init__(self, path, retries=100):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < SHM_SIZE:
+            self._mm.close()
+            raise ValueError(f"{path} is too small for a pose channel")
+        magic, version, count = SHM_HEADER.unpack_from(self._mm, 0)[:3]
+        if magic != SHM_MAGIC or version != SHM_VERSION or count != SHM_LANDMARK_COUNT:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {SHM_VERSION} pose channel")
+        self.retries = retries
+        self._seq = np.ndarray((1,), dtype="<u8", buffer=self._mm, offset=SHM_SEQ_OFFSET)
+        self._landmarks = np.ndarray(
+            (SHM_LANDMARK_COUNT, 4), dtype="<f4", buffer=self._mm, offset=SHM_LANDMARKS_OFFSET
+        )
+
+    def sequence(self):
+        """Current sequence number; cheap enough to poll for changes."""
+        return int(self._seq[0])
+
+    def read(self, last_seq=None):
+        """Return the newest pose as a dict, or None.
+
+        None means nothing has been published yet, the pose still has sequence
+        `last_seq`, or the writer kept the lock for all retries. `landmarks` is a
+        private copy and is None when `has_pose` is false.
+        """
+        for _ in range(self.retries):
+            seq = int(self._seq[0])
+            if seq == 0 or seq == last_seq:
+                return None
+            if seq & 1:
+                continue
+            capture_ms, frame_seq, flags = SHM_INFO.unpack_from(self._mm, SHM_INFO_OFFSET)
+            has_pose = bool(flags & SHM_FLAG_HAS_POSE)
+            landmarks = self._landmarks.copy() if has_pose else None
+            if int(self._seq[0]) == seq:
+                return {
+                    "seq": seq,
+                    "frame_seq": frame_seq,
+                    "capture_ms": capture_ms,
+                    "has_pose": has_pose,
+                    "landmarks": landmarks,
+                }
+        return None
+
+    def close(self):
+        self._seq = None
+        self._landmarks = None
+        self._mm.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python pose_shm.py <shm_file>")
+        sys.exit(1)
+
+    reader = PoseShmReader(sys.argv[1])
+    last_seq = None
+    try:
+        while True:
+            pose = reader.read(last_seq)
+            if pose is None:
+                time.sleep(0.001)
+                continue
+            last_seq = pose["seq"]
+            if pose["has_pose"]:
+                nose = pose["landmarks"][0]
+                print(f"frame_seq={pose['frame_seq']} nose=(x={nose[0]:.3f}, y={nose[1]:.3f}, z={nose[2]:.3f})")
+            else:
+                print(f"frame_seq={pose['frame_seq']} no pose")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
@@ -0,0 +1,123 @@
+import sys
+import os
+import json
+import struct
+import numpy as np
+
+# Add the python scripts directory to the path so we can import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import generate_avatar
+
+
+def _read_glb(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, length = struct.unpack_from("<III", data, 0)
+    json_length, json_type = struct.unpack_from("<II", data, 12)
+    gltf = json.loads(data[20:20 + json_length])
+    bin_offset = 20 + json_length
+    bin_length, bin_type = struct.unpack_from("<II", data, bin_offset)
+    return {
+        "magic": magic,
+        "version": version,
+        "length": length,
+        "file_size": len(data),
+        "json_type": json_type,
+        "json_length": json_length,
+        "bin_type": bin_type,
+        "bin": data[bin_offset + 8:bin_offset + 8 + bin_length],
+        "gltf": gltf,
+    }
+
+
+def test_glb_header_and_alignment(tmp_path):
+    output = tmp_path / "avatars" / "avatar.glb"
+    generate_avatar.create_dummy_glb(str(output))
+
+    glb = _read_glb(output)
+    assert glb["magic"] == generate_avatar.GLB_MAGIC
+    assert glb["version"] == 2
+    assert glb["length"] == glb["file_size"]
+    assert glb["json_type"] == generate_avatar.GLB_CHUNK_JSON
+    assert glb["bin_type"] == generate_avatar.GLB_CHUNK_BIN
+    assert glb["json_length"] % 4 == 0
+    assert len(glb["bin"]) == glb["gltf"]["buffers"][0]["byteLength"]
+    assert "uri" not in glb["gltf"]["buffers"][0]
+    for view in glb["gltf"]["bufferViews"]:
+        assert view["byteOffset"] % 4 == 0
+
+
+def test_lod_levels_are_decimated(tmp_path):
+    output = tmp_path / "avatar.glb"
+    generate_avatar.create_dummy_glb(str(output))
+
+    glb = _read_glb(output)
+    gltf = glb["gltf"]
+    assert len(gltf["meshes"]) == len(generate_avatar.DEFAULT_LOD_RATIOS)
+    assert [node["extras"]["lod_level"] for node in gltf["nodes"]] == [0, 1, 2]
+
+    index_counts = []
+    for mesh in gltf["meshes"]:
+        primitive = mesh["primitives"][0]
+        indices = gltf["accessors"][primitive["indices"]]
+        positions = gltf["accessors"][primitive["attributes"]["POSITION"]]
+        view = gltf["bufferViews"][indices["bufferView"]]
+        dtype = "<u2" if indices["componentType"] == generate_avatar.COMPONENT_UNSIGNED_SHORT else "<u4"
+        values = np.frombuffer(glb["bin"], dtype=dtype, count=indices["count"], offset=view["byteOffset"])
+        assert values.max() < positions["count"]
+        index_counts.append(indices["count"])
+
+    assert index_counts[0] > index_counts[1] > index_counts[2] > 0
+
+
+def test_decimate_mesh_keeps_full_ratio_untouched():
+    positions, triangles = generate_avatar.create_placeholder_mesh(rings=8, segments=16)
+    out_positions, out_triangles = generate_avatar.decimate_mesh(positions, triangles, 1.0)
+    assert out_positions is positions
+    assert out_triangles is triangles
+
+
+def test_scene_renders_a_single_lod(tmp_path):
+    output = tmp_path / "avatar.glb"
+    generate_avatar.create_dummy_glb(str(output))
+
+    gltf = _read_glb(output)["gltf"]
+    assert gltf["scenes"][gltf["scene"]]["nodes"] == [0]
+    assert "children" not in gltf["nodes"][0]
+    assert gltf["nodes"][0]["extensions"]["MSFT_lod"]["ids"] == [1, 2]
+    assert "MSFT_lod" in gltf["extensionsUsed"]
+    assert "MSFT_lod" not in gltf.get("extensionsRequired", [])
+
+
+def test_no_lod_contains_zero_area_triangles(tmp_path):
+    output = tmp_path / "avatar.glb"
+    generate_avatar.create_dummy_glb(str(output))
+
+    glb = _read_glb(output)
+    gltf = glb["gltf"]
+    for mesh in gltf["meshes"]:
+        primitive = mesh["primitives"][0]
+        indices = gltf["accessors"][primitive["indices"]]
+        positions = gltf["accessors"][primitive["attributes"]["POSITION"]]
+        dtype = "<u2" if indices["componentType"] == generate_avatar.COMPONENT_UNSIGNED_SHORT else "<u4"
+        triangles = np.frombuffer(
+            glb["bin"], dtype=dtype, count=indices["count"],
+            offset=gltf["bufferViews"][indices["bufferView"]]["byteOffset"],
+        ).reshape(-1, 3)
+        vertices = np.frombuffer(
+            glb["bin"], dtype="<f4", count=positions["count"] * 3,
+            offset=gltf["bufferViews"][positions["bufferView"]]["byteOffset"],
+        ).reshape(-1, 3)
+        corners = vertices[triangles]
+        areas = 0.5 * np.linalg.norm(
+            np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1
+        )
+        assert areas.min() > 1e-9, mesh["name"]
+
+
+def test_placeholder_mesh_faces_outward():
+    positions, triangles = generate_avatar.create_placeholder_mesh(rings=8, segments=16)
+    corners = positions[triangles]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    assert np.all(np.einsum("ij,ij->i", normals, corners.mean(axis=1)) > 0)
@@ -0,0 +1,76 @@
+import sys
+import os
+import struct
+import pytest
+import numpy as np
+
+# Add the python scripts directory to the path so we can import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pose_shm
+
+
+def test_reader_sees_published_pose(tmp_path):
+    path = str(tmp_path / "shm" / "pose.bin")
+    writer = pose_shm.PoseShmWriter(path)
+    reader = pose_shm.PoseShmReader(path)
+    try:
+        assert os.path.getsize(path) == pose_shm.SHM_SIZE
+        assert reader.read() is None
+
+        landmarks = np.arange(132, dtype=np.float32).reshape(33, 4) / 132.0
+        writer.publish(landmarks, frame_seq=7, capture_ms=1234)
+        pose = reader.read()
+        assert pose["seq"] == 2 and pose["frame_seq"] == 7 and pose["capture_ms"] == 1234
+        assert pose["has_pose"]
+        np.testing.assert_array_equal(pose["landmarks"], landmarks)
+        assert reader.read(last_seq=pose["seq"]) is None
+
+        writer.publish(None, frame_seq=8, capture_ms=1250)
+        pose = reader.read(last_seq=2)
+        assert pose["seq"] == 4 and not pose["has_pose"] and pose["landmarks"] is None
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_reader_retries_while_write_in_progress(tmp_path):
+    path = str(tmp_path / "pose.bin")
+    writer = pose_shm.PoseShmWriter(path)
+    reader = pose_shm.PoseShmReader(path, retries=3)
+    try:
+        writer.publish(np.zeros((33, 4), dtype=np.float32), frame_seq=1)
+        writer._seq[0] = 3
+        assert reader.read() is None
+        writer._seq[0] = 4
+        assert reader.read()["seq"] == 4
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_writer_continues_sequence_after_restart(tmp_path):
+    path = str(tmp_path / "pose.bin")
+    writer = pose_shm.PoseShmWriter(path)
+    writer.publish(np.ones((33, 4), dtype=np.float32), frame_seq=9)
+    writer.publish(np.ones((33, 4), dtype=np.float32), frame_seq=10)
+    writer._seq[0] = 5  # died in the middle of a write
+    writer.close()
+
+    reader = pose_shm.PoseShmReader(path)
+    writer = pose_shm.PoseShmWriter(path)
+    try:
+        pose = reader.read(last_seq=4)
+        assert pose["seq"] == 6 and not pose["has_pose"]
+        writer.publish(np.zeros((33, 4), dtype=np.float32), frame_seq=1)
+        assert reader.read(last_seq=6)["seq"] == 8
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_reader_rejects_foreign_file(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(struct.pack("<4s", b"NOPE") + bytes(pose_shm.SHM_SIZE))
+    with pytest.raises(ValueError):
+        pose_shm.PoseShmReader(str(path))
@@ -1,6 +1,17 @@
 import sys
 import os
+import contextlib
+import json
+import logging
+import logging.handlers
+import threading
+import time
+import urllib.error
+import urllib.request
+import socket
+import struct
 import pytest
+import numpy as np
 from unittest.mock import MagicMock, patch
 
 # Add the python scripts directory to the path so we can import modules
@@ -44,3 +55,643 @@ def test_virtual_camera_loop_no_pyvirtualcam(capsys):
     # Since testing the internal import with global mocks is tricky,
     # we'll just basic test that the main function exists and variables are set.
     pass
+
+def test_pose_calibrator_requires_pose():
+    calibrator = holistic_tracker.PoseCalibrator()
+    assert calibrator.calibrate(wait_s=0) is False
+    assert calibrator.update(np.zeros((33, 4), dtype=np.float32)) is None
+
+def test_pose_calibrator_rejects_stale_pose_and_waits_for_fresh_one():
+    calibrator = holistic_tracker.PoseCalibrator()
+    stale = np.zeros((33, 4), dtype=np.float32)
+    calibrator.update(stale)
+    calibrator._latest_time -= 1.0  # tracking lost a second ago
+    assert calibrator.calibrate(wait_s=0.05) is False
+
+    fresh = np.ones((33, 4), dtype=np.float32)
+    threading.Timer(0.05, calibrator.update, args=(fresh,)).start()
+    assert calibrator.calibrate(wait_s=2.0) is True
+    np.testing.assert_array_equal(calibrator._reference, fresh[:, :3])
+
+def test_pose_calibrator_filters_scaled_offsets():
+    calibrator = holistic_tracker.PoseCalibrator()
+    reference = np.zeros((33, 4), dtype=np.float32)
+    calibrator.update(reference)
+    assert calibrator.calibrate() is True
+
+    moved = reference.copy()
+    moved[:, :3] = 0.1
+    offsets = None
+    for _ in range(200):
+        offsets = calibrator.update(moved)
+
+    # Converges to (current - reference) * pose_scale with Y inverted.
+    np.testing.assert_allclose(offsets[0], [0.2, -0.2, 0.1], atol=1e-3)
+
+def test_encode_ik_message_layout():
+    offsets = np.arange(33 * 3, dtype=np.float32).reshape(33, 3)
+    message = holistic_tracker.encode_ik_message(offsets)
+    magic, count, _ = holistic_tracker.IK_MESSAGE_HEADER.unpack_from(message)
+    assert magic == holistic_tracker.IK_MESSAGE_MAGIC
+    assert count == 4
+    joints = np.frombuffer(message, dtype="<f4", offset=holistic_tracker.IK_MESSAGE_HEADER.size).reshape(-1, 3)
+    np.testing.assert_array_equal(joints, offsets[holistic_tracker.IK_TARGET_INDICES])
+
+    full = holistic_tracker.encode_ik_message(offsets, all_joints=True)
+    assert len(full) == holistic_tracker.IK_MESSAGE_HEADER.size + 33 * 12
+
+def test_subscriber_registry_rate_limit_and_expiry():
+    registry = holistic_tracker.SubscriberRegistry(ttl=5.0)
+    registry.subscribe(("127.0.0.1", 6000), "binary", max_rate=10)
+    registry.subscribe(("127.0.0.1", 6001), "json")
+    registry.subscribe(("127.0.0.1", 5005), "ik", persistent=True)
+
+    now = time.monotonic()
+    due = registry.collect_due(now)
+    assert due == {
+        "binary": [("127.0.0.1", 6000)],
+        "json": [("127.0.0.1", 6001)],
+        "ik": [("127.0.0.1", 5005)],
+    }
+    # 10 Hz subscriber is skipped 50 ms later, unlimited ones are not.
+    assert "binary" not in registry.collect_due(now + 0.05)
+    assert "binary" in registry.collect_due(now + 0.2)
+    # Without keepalives only the persistent subscriber survives.
+    assert registry.collect_due(now + 60) == {"ik": [("127.0.0.1", 5005)]}
+
+def test_subscriber_registry_rejects_unknown_format():
+    registry = holistic_tracker.SubscriberRegistry()
+    with pytest.raises(ValueError):
+        registry.subscribe(("127.0.0.1", 6000), "xml")
+
+def test_parse_subscription_datagram():
+    assert holistic_tracker.parse_subscription_datagram(b"HELLO") == ("HELLO", "binary", 0.0)
+    assert holistic_tracker.parse_subscription_datagram(b"hello json 15") == ("HELLO", "json", 15.0)
+    assert holistic_tracker.parse_subscription_datagram(b"BYE") == ("BYE", None, 0.0)
+    assert holistic_tracker.parse_subscription_datagram(b"PING") is None
+
+def test_fan_out_pose_encodes_each_format_once():
+    sock = MagicMock()
+    encoder = MagicMock(return_value=b"payload")
+    due = {"binary": [("127.0.0.1", 6000), ("127.0.0.1", 6001)]}
+    holistic_tracker.fan_out_pose(sock, due, {"binary": encoder})
+    encoder.assert_called_once()
+    assert sock.sendmsg.call_count == 2
+
+def test_read_frame_header_versions():
+    left, right = socket.socketpair()
+    with left, right:
+        left.sendall(struct.pack("<II", 640, 360))
+        assert holistic_tracker.read_frame_header(right) == (holistic_tracker.PIXEL_FORMAT_RGB, 640, 360, None)
+
+        left.sendall(holistic_tracker.FRAME_HEADER_V2.pack(
+            holistic_tracker.FRAME_MAGIC, 2, holistic_tracker.PIXEL_FORMAT_NV12, 1920, 1080))
+        assert holistic_tracker.read_frame_header(right) == (holistic_tracker.PIXEL_FORMAT_NV12, 1920, 1080, None)
+
+        left.sendall(holistic_tracker.FRAME_HEADER_V3.pack(
+            holistic_tracker.FRAME_MAGIC, 3, holistic_tracker.PIXEL_FORMAT_RGBA, 640, 360, 42))
+        assert holistic_tracker.read_frame_header(right) == (holistic_tracker.PIXEL_FORMAT_RGBA, 640, 360, 42)
+
+        left.close()
+        assert holistic_tracker.read_frame_header(right) is None
+
+def test_frame_size_per_pixel_format():
+    assert holistic_tracker.frame_size(holistic_tracker.PIXEL_FORMAT_RGB, 4, 2) == 24
+    assert holistic_tracker.frame_size(holistic_tracker.PIXEL_FORMAT_RGBA, 4, 2) == 32
+    assert holistic_tracker.frame_size(holistic_tracker.PIXEL_FORMAT_I420, 4, 2) == 12
+    with pytest.raises(ValueError):
+        holistic_tracker.frame_size(holistic_tracker.PIXEL_FORMAT_NV12, 3, 2)
+
+def test_yuv420_to_rgb_matches_between_layouts():
+    width, height = 4, 2
+    y = np.full(width * height, 126, dtype=np.uint8)
+    u = np.array([90, 160], dtype=np.uint8)
+    v = np.array([200, 60], dtype=np.uint8)
+    i420 = np.concatenate([y, u, v])
+    nv12 = np.concatenate([y, np.stack([u, v], axis=-1).reshape(-1)])
+
+    rgb = holistic_tracker.yuv420_to_rgb(i420, width, height, holistic_tracker.PIXEL_FORMAT_I420)
+    assert rgb.shape == (height, width, 3)
+    np.testing.assert_array_equal(rgb, holistic_tracker.yuv420_to_rgb(nv12, width, height, holistic_tracker.PIXEL_FORMAT_NV12))
+
+    gray = holistic_tracker.yuv420_to_rgb(
+        np.concatenate([y, np.full(4, 128, dtype=np.uint8)]), width, height, holistic_tracker.PIXEL_FORMAT_I420)
+    assert np.all(np.abs(gray.astype(int) - 128) <= 1)
+
+def test_frame_for_camera_drops_alpha_when_not_native():
+    rgba = np.arange(2 * 2 * 4, dtype=np.uint8)
+    frame = holistic_tracker.frame_for_camera(rgba, holistic_tracker.PIXEL_FORMAT_RGBA, 2, 2, native=False)
+    assert frame.shape == (2, 2, 3)
+    np.testing.assert_array_equal(frame[0, 0], [0, 1, 2])
+
+def _solid_slot(compositor, color, width=4, height=2, pixel_format=None):
+    pixel_format = holistic_tracker.PIXEL_FORMAT_RGB if pixel_format is None else pixel_format
+    channels = 4 if pixel_format == holistic_tracker.PIXEL_FORMAT_RGBA else 3
+    slot = compositor.add_source(("127.0.0.1", 0))
+    frame = np.tile(np.array(color, dtype=np.uint8), width * height)
+    assert frame.size == width * height * channels
+    slot.store(frame, pixel_format, width, height)
+    return slot
+
+def test_compositor_side_by_side_scales_into_halves():
+    compositor = holistic_tracker.VirtualCameraCompositor("side_by_side")
+    _solid_slot(compositor, [255, 0, 0])
+    _solid_slot(compositor, [0, 0, 255], width=8, height=8)
+    out = np.zeros((4, 8, 3), dtype=np.uint8)
+    compositor.compose(out, compositor.live_sources())
+    assert np.all(out[:, :4] == [255, 0, 0])
+    assert np.all(out[:, 4:] == [0, 0, 255])
+
+def test_compositor_pip_and_overlay():
+    pip = holistic_tracker.VirtualCameraCompositor("pip")
+    _solid_slot(pip, [10, 10, 10])
+    _solid_slot(pip, [200, 200, 200])
+    out = np.zeros((64, 128, 3), dtype=np.uint8)
+    pip.compose(out, pip.live_sources())
+    assert np.all(out[0, 0] == 10)
+    x, y, w, h = pip.regions(2, 128, 64)[1]
+    assert (w, h) == (32, 16)
+    assert np.all(out[y:y + h, x:x + w] == 200)
+
+    overlay = holistic_tracker.VirtualCameraCompositor("overlay")
+    _solid_slot(overlay, [0, 0, 0])
+    _solid_slot(overlay, [255, 255, 255, 0], pixel_format=holistic_tracker.PIXEL_FORMAT_RGBA)
+    out = np.zeros((2, 4, 3), dtype=np.uint8)
+    overlay.compose(out, overlay.live_sources())
+    # Fully transparent overlay leaves the base source visible.
+    assert np.all(out == 0)
+
+def test_compositor_overlay_blends_into_reused_scratch():
+    overlay = holistic_tracker.VirtualCameraCompositor("overlay")
+    _solid_slot(overlay, [100, 0, 200])
+    _solid_slot(overlay, [200, 255, 0, 128], pixel_format=holistic_tracker.PIXEL_FORMAT_RGBA)
+    _solid_slot(overlay, [0, 0, 0])
+    out = np.zeros((2, 4, 3), dtype=np.uint8)
+    overlay.compose(out, overlay.live_sources())
+    scratch = overlay._blend
+
+    # RGBA alpha 128/255 first, then the RGB source at 50%.
+    first = np.array([100, 0, 200]) + (np.array([200, 255, 0]) - [100, 0, 200]) * (128 / 255)
+    assert np.all(np.abs(out.astype(int) - np.rint(np.rint(first) * 0.5)) <= 1)
+    overlay.compose(out, overlay.live_sources())
+    assert overlay._blend is scratch
+
+def test_compositor_drops_stale_and_removed_sources():
+    compositor = holistic_tracker.VirtualCameraCompositor("side_by_side", stale_after=1.0)
+    first = _solid_slot(compositor, [1, 2, 3])
+    second = _solid_slot(compositor, [4, 5, 6])
+    compositor.add_source(("127.0.0.1", 0))  # connected but never sent a frame
+    assert compositor.live_sources() == [first, second]
+    assert compositor.live_sources(time.monotonic() + 5.0) == []
+    compositor.remove_source(first)
+    assert compositor.live_sources() == [second]
+
+def test_virtual_camera_loop_survives_camera_open_failure():
+    slot = holistic_tracker.FrameSlot(("127.0.0.1", 0))
+    slot.store(np.zeros(2 * 2 * 3, dtype=np.uint8), holistic_tracker.PIXEL_FORMAT_RGB, 2, 2)
+    fake_vcam = MagicMock()
+    fake_vcam.Camera.side_effect = RuntimeError("no backend")
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 3:
+            raise KeyboardInterrupt
+
+    with patch.dict(sys.modules, {"pyvirtualcam": fake_vcam}), \
+            patch.object(holistic_tracker, "VIRTUAL_CAM_PORT", 0), \
+            patch.object(holistic_tracker.VirtualCameraCompositor, "live_sources", return_value=[slot]), \
+            patch.object(holistic_tracker.time, "sleep", side_effect=fake_sleep):
+        holistic_tracker.virtual_camera_loop()
+
+    assert fake_vcam.Camera.call_count == 3
+    assert sleeps == [holistic_tracker.VCAM_RETRY_S] * 3
+
+def test_frame_slot_never_hands_out_a_buffer_being_read():
+    slot = holistic_tracker.FrameSlot(("127.0.0.1", 0))
+    slot.store(np.full(12, 1, dtype=np.uint8), holistic_tracker.PIXEL_FORMAT_RGB, 2, 2, 1)
+    with slot.frame() as frame:
+        for value in (2, 3, 4):
+            buffer = slot.writable(12)
+            assert buffer is not frame["data"]
+            buffer[:] = value
+            slot.publish(buffer, holistic_tracker.PIXEL_FORMAT_RGB, 2, 2, value)
+        assert np.all(frame["data"] == 1) and frame["frame_seq"] == 1
+    with slot.frame() as frame:
+        assert np.all(frame["data"] == 4)
+    assert len(slot._buffers) <= holistic_tracker.FrameSlot.BUFFER_COUNT
+
+def test_virtual_camera_composite_size_survives_source_changes():
+    first = _solid_slot(holistic_tracker.VirtualCameraCompositor("single"), [1, 2, 3], width=8, height=4)
+    second = _solid_slot(holistic_tracker.VirtualCameraCompositor("single"), [4, 5, 6], width=16, height=8)
+    fake_vcam = MagicMock()
+    cam = fake_vcam.Camera.return_value
+    cam.sleep_until_next_frame.side_effect = [None, None, KeyboardInterrupt]
+
+    with patch.dict(sys.modules, {"pyvirtualcam": fake_vcam}), \
+            patch.object(holistic_tracker, "VIRTUAL_CAM_PORT", 0), \
+            patch.object(holistic_tracker.VirtualCameraCompositor, "live_sources",
+                         side_effect=[[first, second], [second], [second, first]]):
+        holistic_tracker.virtual_camera_loop("side_by_side")
+
+    fake_vcam.Camera.assert_called_once_with(width=8, height=4, fps=30)
+    cam.close.assert_called_once()
+    assert all(call.args[0].shape == (4, 8, 3) for call in cam.send.call_args_list)
+
+def test_compositor_reports_only_drawn_sources():
+    pip = holistic_tracker.VirtualCameraCompositor("pip")
+    for seq in range(1, 5):
+        pip.add_source(("127.0.0.1", seq)).store(
+            np.zeros(4 * 4 * 3, dtype=np.uint8), holistic_tracker.PIXEL_FORMAT_RGB, 4, 4, seq)
+    out = np.zeros((8, 16, 3), dtype=np.uint8)
+    # Only two insets fit under the full-frame source at this height.
+    assert pip.compose(out, pip.live_sources()) == [1, 2, 3]
+
+def test_virtual_camera_single_skips_latency_for_unsent_frames():
+    slot = holistic_tracker.FrameSlot(("127.0.0.1", 0))
+    slot.store(np.zeros(2 * 2 * 3, dtype=np.uint8), holistic_tracker.PIXEL_FORMAT_RGB, 2, 2, 7)
+    stale = {"data": slot.data, "pixel_format": holistic_tracker.PIXEL_FORMAT_RGB, "width": 4, "height": 1, "frame_seq": 6}
+    latency = MagicMock()
+    fake_vcam = MagicMock()
+    cam = fake_vcam.Camera.return_value
+    cam.sleep_until_next_frame.side_effect = [None, KeyboardInterrupt]
+
+    with patch.dict(sys.modules, {"pyvirtualcam": fake_vcam}), \
+            patch.object(holistic_tracker, "VIRTUAL_CAM_PORT", 0), \
+            patch.object(holistic_tracker.VirtualCameraCompositor, "live_sources", return_value=[slot]), \
+            patch.object(slot, "frame", side_effect=[contextlib.nullcontext(stale), slot.frame()]):
+        holistic_tracker.virtual_camera_loop("single", latency_tracker=latency)
+
+    assert cam.send.call_count == 1
+    assert [c.args[0] for c in latency.record_output.call_args_list] == [7]
+
+class FakeCapture:
+    """Driver stub that only supports the listed (width, height) sizes."""
+
+    def __init__(self, sizes):
+        self.sizes = sizes
+        self.props = {}
+        self.reads = 0
+
+    def set(self, prop, value):
+        self.props[prop] = value
+        return True
+
+    def get(self, prop):
+        cv2 = holistic_tracker.cv2
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            size = (self.props.get(cv2.CAP_PROP_FRAME_WIDTH, 640), self.props.get(cv2.CAP_PROP_FRAME_HEIGHT, 480))
+            if size not in self.sizes:
+                size = (640, 480)
+            return size[0] if prop == cv2.CAP_PROP_FRAME_WIDTH else size[1]
+        return self.props.get(prop, 0)
+
+    def read(self):
+        self.reads += 1
+        return True, None
+
+def test_apply_capture_mode_sets_fourcc_and_buffer():
+    cap = FakeCapture({(1280, 720)})
+    actual = holistic_tracker.apply_capture_mode(
+        cap, {"width": 1280, "height": 720, "fps": 30, "codec": "MJPG"}, buffer_size=1)
+    assert actual["codec"] == "MJPG"
+    assert (actual["width"], actual["height"]) == (1280, 720)
+    assert cap.props[holistic_tracker.cv2.CAP_PROP_BUFFERSIZE] == 1
+
+def test_auto_select_skips_modes_the_driver_rejects():
+    cap = FakeCapture({(1280, 720), (640, 480)})
+    mode, measured = holistic_tracker.auto_select_capture_mode(cap, frames=3)
+    assert (mode["width"], mode["height"]) == (1280, 720)
+    assert measured["fps"] > 0
+
+def test_configure_capture_caches_auto_mode(tmp_path):
+    config = {
+        "mode": {"width": None, "height": None, "fps": None, "codec": None},
+        "buffer_size": 1,
+        "auto_mode": True,
+        "refresh": False,
+        "cache_file": str(tmp_path / "capture_modes.json"),
+        "device_name": "Test Cam",
+    }
+    first = FakeCapture({(640, 480)})
+    holistic_tracker.configure_capture(first, 0, "DEFAULT", config)
+    assert first.reads > 0
+    cache = holistic_tracker.load_capture_cache(config["cache_file"])
+    assert cache["0:Test Cam:DEFAULT"]["width"] == 640
+
+    second = FakeCapture({(640, 480)})
+    holistic_tracker.configure_capture(second, 0, "DEFAULT", config)
+    assert second.reads == 0
+
+def _standing_landmarks():
+    landmarks = np.zeros((33, 4), dtype=np.float32)
+    landmarks[:, 3] = 1.0
+    points = {
+        "left_shoulder": (0.6, 0.3, 0.0), "right_shoulder": (0.4, 0.3, 0.0),
+        "left_hip": (0.6, 0.6, 0.0), "right_hip": (0.4, 0.6, 0.0),
+        # Left arm raised sideways with the forearm pointing up: 90 degree elbow.
+        "left_elbow": (0.8, 0.3, 0.0), "left_wrist": (0.8, 0.1, 0.0),
+        "right_elbow": (0.4, 0.45, 0.0), "right_wrist": (0.4, 0.6, 0.0),
+        "left_knee": (0.6, 0.8, 0.0), "left_ankle": (0.6, 1.0, 0.0),
+        "right_knee": (0.4, 0.8, 0.0), "right_ankle": (0.4, 1.0, 0.0),
+    }
+    for name, point in points.items():
+        landmarks[holistic_tracker.POSE_LANDMARK_NAMES.index(name), :3] = point
+    return landmarks
+
+def test_compute_pose_features():
+    landmarks = _standing_landmarks()
+    landmarks[holistic_tracker.POSE_LANDMARK_NAMES.index("right_knee"), 3] = 0.1
+    features = holistic_tracker.compute_pose_features(landmarks)
+    angles = dict(zip(holistic_tracker.JOINT_ANGLES, features["joint_angles"]))
+    lengths = dict(zip(holistic_tracker.POSE_SEGMENTS, features["bone_lengths"]))
+
+    assert features["scale"] == pytest.approx(0.3)
+    assert lengths["left_forearm"] == pytest.approx(0.2)
+    assert angles["left_elbow"] == pytest.approx(90.0, abs=1e-3)
+    assert angles["right_elbow"] == pytest.approx(180.0, abs=1e-3)
+    assert np.isnan(angles["right_knee"])
+
+    shoulder = holistic_tracker.POSE_LANDMARK_NAMES.index("left_shoulder")
+    np.testing.assert_allclose(features["normalized"][shoulder], [0.1 / 0.3, -1.0, 0.0], atol=1e-5)
+    # Torso frame: +x toward the left hip, +y from hips toward shoulders.
+    np.testing.assert_allclose(features["torso"][shoulder], [0.1 / 0.3, 1.0, 0.0], atol=1e-5)
+
+    body = holistic_tracker.build_features_payload(features, 123)
+    assert body["joint_angles"]["right_knee"] is None
+    assert body["bone_lengths"]["right_thigh"]["visible"] is False
+    assert len(holistic_tracker.encode_features_binary(features)) == 4 * (1 + 3 + 9 + 99 + 99 + 12 + 8)
+
+def test_pose_state_caches_encoded_bodies():
+    state = holistic_tracker.PoseState()
+    encode = MagicMock(return_value=b"{}")
+    assert state.get_encoded("pose", encode) is None
+
+    state.set_payload({"timestamp_ms": 1})
+    assert state.get_encoded("pose", encode) == b"{}"
+    assert state.get_encoded("pose", encode) == b"{}"
+    assert encode.call_count == 1
+
+    state.set_payload({"timestamp_ms": 2})
+    state.get_encoded("pose", encode)
+    assert encode.call_count == 2
+
+def test_pose_state_encodes_outside_lock_and_drops_stale_bytes():
+    state = holistic_tracker.PoseState()
+    state.set_payload({"timestamp_ms": 1})
+
+    def encode(payload, features, updated_ms):
+        # Runs unlocked: the tracking thread can publish a newer pose meanwhile.
+        state.set_payload({"timestamp_ms": 2})
+        return json.dumps(payload).encode()
+
+    assert state.get_encoded("pose", encode) == b'{"timestamp_ms": 1}'
+    assert state.get_encoded("pose", lambda payload, *_: json.dumps(payload).encode()) == b'{"timestamp_ms": 2}'
+
+def test_http_listener_serves_features():
+    args = holistic_tracker.build_parser().parse_args(["--listen-port", "0"])
+    state = holistic_tracker.PoseState()
+    server = holistic_tracker.start_pose_http_listener(
+        args, state, holistic_tracker.PoseCalibrator(), holistic_tracker.SubscriberRegistry(),
+        holistic_tracker.LatencyTracker(), holistic_tracker.TrackerControl())
+    try:
+        landmarks = _standing_landmarks()
+        state.set_payload({"timestamp_ms": 5, "has_pose": True}, holistic_tracker.compute_pose_features(landmarks))
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(base + "/pose/features") as response:
+            body = json.loads(response.read())
+        assert body["features"]["joint_angles"]["left_elbow"] == pytest.approx(90.0, abs=1e-3)
+        with urllib.request.urlopen(base + "/pose/features?format=binary") as response:
+            assert response.headers["Content-Type"] == "application/octet-stream"
+            scale = np.frombuffer(response.read(4), dtype="<f4")[0]
+        assert scale == pytest.approx(0.3)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_latency_tracker_counts_first_output_per_frame():
+    latency = holistic_tracker.LatencyTracker()
+    latency.record_capture(1, 10.0)
+    latency.record_capture(2, 10.030)
+    latency.record_capture(3, 10.060)
+
+    assert latency.record_output(0, 10.1) is None  # sender has no pose yet
+    assert latency.record_output(2, 10.100) == pytest.approx(70.0)
+    assert latency.record_output(2, 10.133) is None  # repeated frame
+    assert latency.record_output(1, 10.140) is None  # superseded by frame 2
+    assert latency.record_output(3, 10.150) == pytest.approx(90.0)
+
+    stats = latency.stats()["glass_to_glass"]
+    assert stats["samples"] == 2
+    assert stats["last_ms"] == pytest.approx(90.0)
+    assert stats["max_ms"] == pytest.approx(90.0)
+    assert stats["histogram"]["counts"][7] == 1
+    assert sum(stats["histogram"]["counts"]) == 2
+
+def test_encode_pose_message_prefixes_frame_seq():
+    landmarks = np.zeros((33, 4), dtype=np.float32)
+    message = holistic_tracker.encode_pose_message(landmarks, 7)
+    magic, frame_seq = holistic_tracker.POSE_MESSAGE_HEADER.unpack_from(message)
+    assert (magic, frame_seq) == (holistic_tracker.POSE_MESSAGE_MAGIC, 7)
+    assert len(message) == 8 + 528
+
+def test_validate_control_changes():
+    assert holistic_tracker.validate_control_changes({"camera_index": 2, "transport": "UDP"}) == {
+        "camera_index": 2,
+        "transport": "udp",
+    }
+    assert holistic_tracker.validate_control_changes({"udp_host": "127.0.0.1"}) == {"udp_host": "127.0.0.1"}
+    assert holistic_tracker.validate_control_changes({"inference_fps": 0}) == {"inference_fps": 0.0}
+    for body in ({}, {"camera_index": -1}, {"camera_index": "1"}, {"udp_port": 70000},
+                 {"http_url": "ftp://x"}, {"debug": "yes"}, {"unknown": 1},
+                 {"udp_host": None}, {"udp_host": 5}, {"udp_host": " "}, {"udp_host": "no-such-host.invalid"},
+                 {"inference_fps": 1e-300}, {"inference_fps": 0.5}, {"inference_fps": float("nan")},
+                 {"inference_fps": float("inf")}, {"debug_interval": True}, {"camera_index": float("inf")},
+                 {"camera_index": 1.0}, {"udp_port": 5.7}, {"udp_port": True}, {"udp_port": "6000"}):
+        with pytest.raises(ValueError):
+            holistic_tracker.validate_control_changes(body)
+
+def test_validate_control_changes_keeps_targets_local():
+    assert holistic_tracker.validate_control_changes({"http_url": "http://localhost:9000/pose"})
+    for body in ({"http_url": "https://203.0.113.5/collect"}, {"udp_host": "203.0.113.5"}):
+        with pytest.raises(ValueError, match="allow-remote-targets"):
+            holistic_tracker.validate_control_changes(body)
+        assert holistic_tracker.validate_control_changes(body, allow_remote=True)
+
+def _post(url, content_type=None, body=b""):
+    request = urllib.request.Request(url, data=body, method="POST")
+    if content_type:
+        request.add_header("Content-Type", content_type)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, json.loads(e.read())
+
+def test_http_control_rejects_cross_origin_style_requests():
+    args = holistic_tracker.build_parser().parse_args(["--listen-port", "0"])
+    control = holistic_tracker.TrackerControl()
+    server = holistic_tracker.start_pose_http_listener(
+        args, holistic_tracker.PoseState(), holistic_tracker.PoseCalibrator(), holistic_tracker.SubscriberRegistry(),
+        holistic_tracker.LatencyTracker(), control)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        remote = json.dumps({"http_url": "https://203.0.113.5/collect"}).encode()
+        status, headers, _ = _post(base + "/control", "text/plain", remote)
+        assert status == 415 and "Access-Control-Allow-Origin" not in headers
+        status, _, body = _post(base + "/control", "application/json", remote)
+        assert status == 400 and "http_url" in body["error"]
+        assert _post(base + "/calibrate", "text/plain")[0] == 415
+        assert _post(base + "/calibrate/reset", "text/plain")[0] == 415
+        assert _post(base + "/calibrate/reset", "application/json")[0] == 200
+        status, _, body = _post(base + "/control", "application/json", b'{"camera_index": Infinity}')
+        assert status == 400 and "camera_index" in body["error"]
+        assert control.take() == ({}, [])
+
+        request = urllib.request.Request(base + "/control", method="OPTIONS")
+        with urllib.request.urlopen(request) as response:
+            assert "POST" not in response.headers["Access-Control-Allow-Methods"]
+            assert response.headers["Access-Control-Allow-Headers"] is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_http_subscribe_keeps_targets_local():
+    args = holistic_tracker.build_parser().parse_args(["--listen-port", "0"])
+    registry = holistic_tracker.SubscriberRegistry()
+    server = holistic_tracker.start_pose_http_listener(
+        args, holistic_tracker.PoseState(), holistic_tracker.PoseCalibrator(), registry,
+        holistic_tracker.LatencyTracker(), holistic_tracker.TrackerControl())
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        assert _post(base + "/subscribe?port=6000", "text/plain")[0] == 415
+        assert _post(base + "/subscribe?port=9&host=203.0.113.5", "application/json")[0] == 400
+        assert registry.snapshot() == []
+
+        status, _, body = _post(base + "/subscribe?port=6000", "application/json")
+        assert status == 200
+        assert [(s["host"], s["port"]) for s in body["subscribers"]] == [("127.0.0.1", 6000)]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_apply_control_changes_switches_camera_and_transport():
+    args = holistic_tracker.build_parser().parse_args([])
+    old_cap, new_cap = MagicMock(), MagicMock()
+    runtime = {"cap": old_cap, "backend_name": "DEFAULT", "camera_index": 0, "sock": None}
+    registry = holistic_tracker.SubscriberRegistry()
+    calibrator = holistic_tracker.PoseCalibrator()
+    changes = holistic_tracker.validate_control_changes(
+        {"camera_index": 1, "transport": "udp", "udp_port": 6100, "ik_process_noise": 0.05})
+
+    with patch.object(holistic_tracker, "open_selected_camera", return_value=(new_cap, "DEFAULT")):
+        holistic_tracker.apply_control_changes(changes, args, runtime, registry, calibrator, [])
+
+    old_cap.release.assert_called_once()
+    assert runtime["cap"] is new_cap and runtime["camera_index"] == 1
+    assert runtime["sock"] is not None
+    runtime["sock"].close()
+    assert {(s["port"], s["format"]) for s in registry.snapshot()} == {(6100, "pose"), (6100, "ik")}
+    assert calibrator.get_smoothing() == (0.05, 0.2)
+
+def test_apply_control_changes_is_atomic_when_camera_fails():
+    args = holistic_tracker.build_parser().parse_args([])
+    cap = MagicMock()
+    runtime = {"cap": cap, "backend_name": "DEFAULT", "camera_index": 0, "sock": None}
+    changes = {"camera_index": 3, "transport": "none"}
+
+    with patch.object(holistic_tracker, "open_selected_camera", return_value=(None, None)):
+        with pytest.raises(ValueError):
+            holistic_tracker.apply_control_changes(
+                changes, args, runtime, holistic_tracker.SubscriberRegistry(), holistic_tracker.PoseCalibrator(), [])
+
+    cap.release.assert_not_called()
+    assert runtime["camera_index"] == 0
+    assert args.transport == "http"
+
+def test_tracker_control_merges_pending_changes():
+    control = holistic_tracker.TrackerControl()
+    first = control.submit({"debug": True})
+    second = control.submit({"debug_interval": 2})
+    changes, tickets = control.take()
+    assert changes == {"debug": True, "debug_interval": 2.0}
+    control.finish(tickets, "boom")
+    assert first["event"].is_set() and second["error"] == "boom"
+    assert control.take() == ({}, [])
+
+def _log_record(msg="hit"):
+    return logging.LogRecord("holistic_tracker.http", logging.INFO, __file__, 0, msg, (), None)
+
+def test_sampled_rate_limit_filter_samples_and_counts_drops():
+    sampled = holistic_tracker.SampledRateLimitFilter(sample_every=3)
+    assert [sampled.filter(_log_record()) for _ in range(6)] == [False, False, True, False, False, True]
+
+    limited = holistic_tracker.SampledRateLimitFilter(rate=1.0, burst=2)
+    kept = [limited.filter(_log_record()) for _ in range(5)]
+    assert kept == [True, True, False, False, False]
+    limited._last -= 1.0
+    record = _log_record()
+    assert limited.filter(record)
+    assert record.getMessage() == "hit (3 similar suppressed)"
+
+def test_setup_logging_writes_through_background_rotating_file(tmp_path):
+    log_file = tmp_path / "logs" / "tracker.log"
+    listener = holistic_tracker.setup_logging(str(log_file), max_bytes=200, backups=1)
+    try:
+        handler, = holistic_tracker.logger.handlers
+        assert isinstance(handler, logging.handlers.QueueHandler)
+        holistic_tracker.configure_log_category(holistic_tracker.access_logger, enabled=False)
+        holistic_tracker.access_logger.info("request line")
+        for i in range(10):
+            holistic_tracker.logger.info("line %d with some padding", i)
+    finally:
+        listener.stop()
+        holistic_tracker.configure_log_category(holistic_tracker.access_logger)
+        holistic_tracker.logger.handlers.clear()
+
+    assert (tmp_path / "logs" / "tracker.log.1").exists()
+    text = log_file.read_text() + (tmp_path / "logs" / "tracker.log.1").read_text()
+    assert "line 9" in text and "request line" not in text
+
+def test_mirror_landmarks_matches_flipped_frame():
+    names = holistic_tracker.POSE_LANDMARK_NAMES
+    raw = np.random.default_rng(3).random((33, 4)).astype(np.float32)
+    mirrored = holistic_tracker.mirror_landmarks(raw)
+
+    left, right = names.index("left_wrist"), names.index("right_wrist")
+    nose = names.index("nose")
+    assert mirrored[left, 0] == pytest.approx(1.0 - raw[right, 0])
+    np.testing.assert_array_equal(mirrored[left, 1:], raw[right, 1:])
+    assert mirrored[nose, 0] == pytest.approx(1.0 - raw[nose, 0])
+    np.testing.assert_allclose(holistic_tracker.mirror_landmarks(mirrored), raw, atol=1e-6)
+
+def test_build_pose_payload_from_landmark_array():
+    landmarks = np.full((33, 4), 0.1234567, dtype=np.float32)
+    landmarks[0] = (0.5, 0.25, -0.125, 1.0)
+    payload = holistic_tracker.build_pose_payload(landmarks, frame_seq=5, capture_ms=100)
+
+    assert payload["has_pose"] and payload["frame_seq"] == 5
+    assert payload["landmarks"]["nose"] == {"x": 0.5, "y": 0.25, "z": -0.125, "visibility": 1.0}
+    assert payload["landmarks"]["left_wrist"]["x"] == 0.123457
+    segment = payload["segments"]["left_forearm"]
+    assert segment["start_point"] is payload["landmarks"]["left_elbow"]
+
+def test_to_rgb_reuses_buffer_until_shape_changes():
+    frame = np.zeros((4, 6, 3), dtype=np.uint8)
+    with patch.object(holistic_tracker.cv2, "cvtColor") as cvt:
+        first = holistic_tracker.to_rgb(frame)
+        assert holistic_tracker.to_rgb(frame, first) is first
+        assert cvt.call_args.kwargs["dst"] is first
+        assert not first.flags.writeable
+        resized = holistic_tracker.to_rgb(np.zeros((8, 6, 3), dtype=np.uint8), first)
+    assert resized is not first and resized.shape == (8, 6, 3)
+
+def test_tracker_control_wait_wakes_on_submit():
+    control = holistic_tracker.TrackerControl()
+    assert not control.wait(0)
+    threading.Timer(0.05, control.submit, args=({"debug": True},)).start()
+    start = time.perf_counter()
+    assert control.wait(5.0)
+    assert time.perf_counter() - start < 1.0
+    control.take()
+    assert not control.wait(0)
@@ -7,6 +7,9 @@ import time
 import argparse
 from pathlib import Path
 
+# Godot consumes binary UDP pose/IK messages and calibrates through the HTTP listener.
+TRACKER_ARGS = ["--transport", "udp", "--listen-http"]
+
 def get_os():
     return platform.system()
 
@@ -83,6 +86,8 @@ def main():
         tracker_cmd = [sys.executable, python_script]
         godot_cmd = [args.godot_path, "--path", project_path]
 
+    tracker_cmd += TRACKER_ARGS
+
     # Launch Python tracker
     print(f"Starting Python tracker: {tracker_cmd}")
     try: